@@ -1,6 +1,8 @@
+import time
+STARTUP_BEGIN = time.perf_counter()
+
 from PyQt5.QtWidgets import QPushButton, QMainWindow, QTextEdit, QComboBox, QApplication, QMessageBox, QScrollArea, QLineEdit, QHBoxLayout
 from PyQt5.QtCore import QEventLoop
-from PyQt5 import uic
 import asyncio
 import sys
 from asyncqt import QEventLoop
@@ -8,24 +10,53 @@ import logging
 # import from scr
 from src.Logging import *
 from src.BlockTab import BlockTab
+from src.UiLoader import setup_ui
 # end
 
 
+class StartupProfile:
+    """Wall-clock time of each startup phase, logged with --profile-startup."""
+
+    def __init__(self, enabled=False, start=STARTUP_BEGIN):
+        self.enabled = enabled
+        self.start = start
+        self.last = start
+        self.phases = []
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled:
+            return
+        for phase, duration in self.phases:
+            logging.info(f"Startup {phase}: {duration * 1000:.1f}ms")
+        logging.info(f"Startup total: {(self.last - self.start) * 1000:.1f}ms")
+
+
 class AutomationGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, profile=None):
         super().__init__()
-        uic.loadUi('UI/main.ui', self)
+        profile = profile or StartupProfile()
+        setup_ui(self)
+        profile.mark("load UI")
         current_geometry = self.geometry()
         self.setGeometry(100, 30, current_geometry.width(),
                          current_geometry.height())
         self.block_tab = BlockTab(parent=self)
+        profile.mark("block tab")
         self.init_ui()
+        profile.mark("init ui")
         setup_logging(self)
+        profile.mark("logging")
 
     def init_ui(self):
         self.import_btn = self.findChild(QPushButton, "import_btn")
         self.export_btn = self.findChild(QPushButton, "export_btn")
         self.run_btn = self.findChild(QPushButton, "run_btn")
+        self.stop_btn = self.findChild(QPushButton, "stop_btn")
         self.clear_btn = self.findChild(QPushButton, "clear_btn")
         self.remove_btn = self.findChild(QPushButton, "remove_btn")
         self.reload_btn = self.findChild(QPushButton, "reload_btn")
@@ -37,7 +68,8 @@ class AutomationGUI(QMainWindow):
         self.export_btn.clicked.connect(self.block_tab.export_code)
         self.import_btn.clicked.connect(self.block_tab.import_code)
         self.remove_btn.clicked.connect(self.block_tab.remove_code)
-        self.run_btn.clicked.connect(self.wrap_async(self.block_tab.run_code))
+        self.run_btn.clicked.connect(self.block_tab.start_run)
+        self.stop_btn.clicked.connect(self.wrap_async(self.block_tab.stop_run))
         self.reload_btn.clicked.connect(self.reload_window)
         self.clear_btn.clicked.connect(self.block_tab.clear_steps)
         self.test_case_name_input = QLineEdit()
@@ -50,9 +82,7 @@ class AutomationGUI(QMainWindow):
         self.add_test_case_btn.clicked.connect(self.block_tab.add_test_case)
 
     def reload_window(self):
-        self.close()
-        self.__init__()
-        self.show()
+        self.block_tab.refresh()
 
     def wrap_async(self, coro):
         return lambda: asyncio.create_task(coro())
@@ -97,9 +127,14 @@ class AutomationGUI(QMainWindow):
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
-    window = AutomationGUI()
+    profile = StartupProfile("--profile-startup" in sys.argv)
+    profile.mark("imports")
+    app = QApplication([arg for arg in sys.argv if arg != "--profile-startup"])
+    profile.mark("QApplication")
+    window = AutomationGUI(profile)
     window.show()
+    profile.mark("show")
+    profile.report()
 
     # Run the PyQt5 event loop and asyncio event loop
     loop = QEventLoop(app)
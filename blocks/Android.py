@@ -1,9 +1,12 @@
 from tools.AdbCommand import ADBCommand
+from tools.HardwareConfig import load_hardware_config
 
 import logging
-import asyncio
 
-adb_device = ADBCommand()
+RESOURCES = ["adb"]
+
+adb_device = ADBCommand(
+    serial=load_hardware_config().get("adb", {}).get("serial") or None)
 
 
 async def enable_root_privilege() -> bool:
@@ -23,18 +26,14 @@ async def reboot_to_recovery_mode() -> bool:
     logging.info("Rebooting into recovery mode...")
     await adb_device.reboot_to_mode("Recovery")
     logging.info("Checking if device is in recovery mode...")
-    await asyncio.sleep(3)
-    return adb_device.is_recovery_mode
+    return adb_device.is_recovery_mode()
 
 
 async def reboot_to_normal_mode() -> bool:
     logging.info("Rebooting into normal mode...")
-    await adb_device.reboot_to_mode()
+    booted = await adb_device.reboot_to_mode()
     logging.info("Checking if device is in normal mode...")
-    await asyncio.sleep(3)
-    if not adb_device.is_recovery_mode():
-        return True
-    return False
+    return booted and not adb_device.is_recovery_mode()
 
 
 async def push_service_file_to_device() -> bool:
@@ -44,14 +43,16 @@ async def push_service_file_to_device() -> bool:
 
 async def trigger_property(property) -> bool:
     logging.info(f"Executed with property {property}")
-    return await adb_device.run_adb_shell_command(property)
+    result = await adb_device.run_adb_shell_command(property)
+    return result.returncode == 0
 
 
 BLOCKS = {
     "Enable Root Privilege": enable_root_privilege,
     "Remount Device": remount_device,
     "Push Service File": push_service_file_to_device,
-    "Reboot to Recovery Mode": reboot_to_recovery_mode,
-    "Reboot to Normal Mode": reboot_to_normal_mode,
+    # Disconnect, reboot and boot completion each have their own wait
+    "Reboot to Recovery Mode": {"function": reboot_to_recovery_mode, "timeout": 300},
+    "Reboot to Normal Mode": {"function": reboot_to_normal_mode, "timeout": 300},
     "Trigger Property": trigger_property,
 }
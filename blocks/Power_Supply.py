@@ -1,23 +1,31 @@
+from tools.ToellnerDriver import get_power_supply
 import logging
-import asyncio
+
+RESOURCES = ["power_supply"]
+
+NOMINAL_VOLTAGE = 12
 
 
 async def set_power_off() -> bool:
     logging.info("Set Power Supply: 0V")
-    await asyncio.sleep(1)
+    supply = get_power_supply()
+    await supply.set_voltage(0, readback=False)
+    await supply.set_output(False)
     return True
 
 
 async def set_power_on() -> bool:
-    logging.info("Set Power Supply: 12V")
-    await asyncio.sleep(1)
-    return True
+    logging.info(f"Set Power Supply: {NOMINAL_VOLTAGE}V")
+    return await set_voltage(NOMINAL_VOLTAGE)
 
 
 async def set_voltage(voltage) -> bool:
+    voltage = float(voltage)
     logging.info(f"Set Power Supply: {voltage}")
-    await asyncio.sleep(1)
-    return True
+    supply = get_power_supply()
+    await supply.set_voltage(voltage, readback=False)
+    await supply.set_output(True)
+    return await supply.wait_for_voltage(voltage)
 
 
 BLOCKS = {
@@ -1,21 +1,35 @@
-def disconnect_acc() -> bool:
-    print("Disconnect ACC wire")
-    return True
+from tools.RelayDriver import get_relay_backend
+import logging
+
+RESOURCES = ["relay"]
 
 
-def connect_acc() -> bool:
-    print("Disconnect ACC wire")
+async def apply_relay_state(state) -> bool:
+    relays = get_relay_backend()
+    states = relays.parse_state(state) if isinstance(state, str) else state
+    logging.info(f"Apply relay state {states}")
+    await relays.apply(states)
     return True
 
 
-def diconnect_bat_gnd() -> bool:
-    print("Remove BAT+GND")
-    return True
+async def disconnect_acc() -> bool:
+    logging.info("Disconnect ACC wire")
+    return await apply_relay_state({"ACC": False})
 
 
-def connect_bat_gnd() -> bool:
-    print("Connect BAT+GND")
-    return True
+async def connect_acc() -> bool:
+    logging.info("Connect ACC wire")
+    return await apply_relay_state({"ACC": True})
+
+
+async def diconnect_bat_gnd() -> bool:
+    logging.info("Remove BAT+GND")
+    return await apply_relay_state({"BAT": False, "GND": False})
+
+
+async def connect_bat_gnd() -> bool:
+    logging.info("Connect BAT+GND")
+    return await apply_relay_state({"BAT": True, "GND": True})
 
 
 BLOCKS = {
@@ -23,4 +37,5 @@ BLOCKS = {
     "ACC On": connect_acc,
     "Remove BAT+GND": diconnect_bat_gnd,
     "Connect BAT+GND": connect_bat_gnd,
+    "Relay State (state)": apply_relay_state,
 }
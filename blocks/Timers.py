@@ -10,5 +10,6 @@ async def sleep_for(sec=0) -> bool:
 
 
 BLOCKS = {
-    "Sleep (time)": sleep_for
+    # The requested duration is the step's deadline
+    "Sleep (time)": {"function": sleep_for, "timeout": None}
 }
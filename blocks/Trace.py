@@ -0,0 +1,75 @@
+import logging
+
+from tools.TraceCapture import current_step, get_trace_capture
+from tools.TraceIndex import CaptureIndex, open_index
+from tools.TraceWatch import split_patterns, watch_trace
+
+
+def trace_source(file_path=""):
+    """Index of a saved trace file, or of the live capture by default."""
+    return open_index(file_path) if file_path else CaptureIndex(get_trace_capture())
+
+
+def pattern_between_steps(pattern, step, case=1, file_path="") -> bool:
+    """Pattern appears between the start of step N and the start of step
+    N+1, in the live capture of this run or in a saved trace file."""
+    source = trace_source(file_path)
+    step, case = int(step), int(case or 1)
+    start, end = source.between_steps(step, case)
+    matches = source.search(pattern, start, end, limit=1)
+    if not matches:
+        logging.error(f"'{pattern}' not found between step {step} and {step + 1} of test case {case}")
+        return False
+    offset, line = matches[0]
+    logging.info(f"Found '{pattern}' at {source.describe(offset)}: {line}")
+    return True
+
+
+def pattern_absent_between_steps(pattern, step, case=1, file_path="") -> bool:
+    source = trace_source(file_path)
+    step, case = int(step), int(case or 1)
+    start, end = source.between_steps(step, case)
+    matches = source.search(pattern, start, end, limit=1)
+    if matches:
+        offset, line = matches[0]
+        logging.error(f"'{pattern}' found at {source.describe(offset)}: {line}")
+        return False
+    logging.info(f"'{pattern}' not found between step {step} and {step + 1} of test case {case}")
+    return True
+
+
+async def wait_for_trace(patterns, forbidden="", timeout=30) -> bool:
+    """Wait on the live trace until every pattern (';'-separated regexes)
+    appeared, failing early as soon as a forbidden one does.
+
+    The trace is scanned from the start of the previous step, so output
+    triggered by that step is not missed.
+    """
+    capture = get_trace_capture()
+    required, forbidden = split_patterns(patterns), split_patterns(forbidden)
+    since = None
+    if current_step.get() is not None:
+        case_index, step_index = current_step.get()
+        since = capture.step_offsets.get((case_index, max(step_index - 1, 1), "start"))
+    try:
+        watch = await watch_trace(capture, required, forbidden, float(timeout or 30), since)
+    except ValueError as e:
+        logging.error(str(e))
+        return False
+    for pattern, line in watch.matches.items():
+        logging.info(f"Trace matched '{pattern}': {line}")
+    if watch.violation:
+        pattern, line = watch.violation
+        logging.error(f"Forbidden trace pattern '{pattern}' appeared: {line}")
+        return False
+    if watch.pending:
+        logging.error(f"Trace patterns not seen within {timeout}s: {', '.join(watch.pending.values())}")
+        return False
+    return True
+
+
+BLOCKS = {
+    "Wait For Trace (patterns)": wait_for_trace,
+    "Trace Pattern Between Steps (pattern)": pattern_between_steps,
+    "Trace Pattern Absent Between Steps (pattern)": pattern_absent_between_steps,
+}
@@ -1,41 +1,52 @@
-# from tools.ToellnerDriver import ToellnerDriver
+from tools.ToellnerDriver import get_power_supply
 import logging
-import asyncio
+
+RESOURCES = ["power_supply"]
 
 
 async def set_voltage_state(state) -> bool:
-    logging.info("Voltage Status: Stable %d", state)
-    await asyncio.sleep(1)
-    return True
+    logging.info("Voltage Status: Stable %s", state)
+    supply = get_power_supply()
+    await supply.set_voltage(state, readback=False)
+    await supply.set_output(True)
+    return await supply.wait_for_voltage(state)
 
 
 async def powerloss_warning() -> bool:
-    await set_voltage_state(3)
-    return True
+    return await set_voltage_state(3)
 
 
 async def critical_low() -> bool:
-    await set_voltage_state(6.7)
-    return True
+    return await set_voltage_state(6.7)
 
 
 async def low() -> bool:
-    await set_voltage_state(7)
-    return True
+    return await set_voltage_state(7)
 
 
 async def normal() -> bool:
-    await set_voltage_state(13)
-    return True
+    return await set_voltage_state(13)
 
 
 async def high() -> bool:
-    await set_voltage_state(18)
-    return True
+    return await set_voltage_state(18)
 
 
 async def critical_high() -> bool:
-    await set_voltage_state(25)
+    return await set_voltage_state(25)
+
+
+async def play_waveform(waveform) -> bool:
+    # Not named "profile": CodeBlock.prepare_input opens a *.pro file dialog
+    # for parameters containing "file", and specs like "ramp:..." are typed.
+    # NumPy is only needed by this block, so import it on first use
+    from tools.Waveform import parse_profile, stream_profile
+    times, voltages = parse_profile(waveform)
+    logging.info(f"Playing voltage waveform {waveform} ({len(times)} points)")
+    supply = get_power_supply()
+    await supply.set_voltage(voltages[0], readback=False)
+    await supply.set_output(True)
+    await stream_profile(supply, times, voltages)
     return True
 
 
@@ -46,4 +57,5 @@ BLOCKS = {
     "Normal": normal,
     "High": high,
     "Critical High": critical_high,
+    "Waveform (profile)": play_waveform,
 }
@@ -0,0 +1,86 @@
+"""Run exported test cases without the GUI.
+
+    python -m run testcases/foo.json [testcases/bar.json ...] [--report]
+
+Exits with 0 when every step passed, 1 when a step failed and 2 when a test
+case could not be loaded.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+
+from src.Engine import RUN_TIMEOUT, STEP_TIMEOUT, TestEngine, load_test_case
+from src.Logging import open_test_results_html
+from src.ResultStore import ResultStore
+from src.TestCaseCatalog import TestCaseCatalog
+from tools.TraceCapture import get_trace_capture
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run AutomationGui test cases headless.")
+    parser.add_argument("testcases", nargs="+",
+                        help="exported test case JSON files")
+    parser.add_argument("--report", action="store_true",
+                        help="write an HTML report to test_results/")
+    parser.add_argument("--step-timeout", type=float, default=STEP_TIMEOUT,
+                        help="seconds per step for blocks without their own timeout")
+    parser.add_argument("--run-timeout", type=float, default=RUN_TIMEOUT,
+                        help="seconds per test case file")
+    return parser.parse_args(argv)
+
+
+async def run_all(file_paths, report=None, step_timeout=STEP_TIMEOUT, run_timeout=RUN_TIMEOUT):
+    # run_finished reports False for runs that hit their deadline as well
+    outcomes = []
+    engine = TestEngine(trace=get_trace_capture(),
+                        step_timeout=step_timeout, run_timeout=run_timeout)
+    engine.run_finished.connect(lambda run_id, success: outcomes.append(success))
+    result_store = ResultStore()
+    result_store.attach(engine, report)
+    catalog = TestCaseCatalog()
+    try:
+        for file_path in file_paths:
+            logging.info(f"Running {file_path}")
+            if report:
+                def write_test_case(case_index, test_case, steps):
+                    report.write_test_case(f"{file_path} - {test_case}", steps, case_index)
+                engine.case_finished.connect(write_test_case)
+            try:
+                await engine.run(load_test_case(file_path))
+            finally:
+                if report:
+                    engine.case_finished.disconnect(write_test_case)
+            catalog.record_result(file_path, outcomes[-1])
+    finally:
+        result_store.detach(engine)
+        result_store.close()
+        await engine.trace.stop()
+    return all(outcomes)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = open_test_results_html(get_trace_capture()) if args.report else None
+    try:
+        passed = asyncio.run(run_all(args.testcases, report,
+                                     args.step_timeout, args.run_timeout))
+    except (IOError, json.JSONDecodeError) as e:
+        logging.error(f"Error loading test case: {e}")
+        return 2
+    except KeyboardInterrupt:
+        # asyncio.run cancelled the run; its finished steps are in the report
+        logging.error("Run stopped")
+        return 1
+    finally:
+        if report:
+            report.close()
+
+    logging.info("PASS" if passed else "FAIL")
+    return 0 if passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
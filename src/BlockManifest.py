@@ -0,0 +1,74 @@
+import ast
+import inspect
+
+
+class DynamicModule(Exception):
+    """The module's blocks cannot be read without importing it."""
+
+
+def literal(node):
+    try:
+        return ast.literal_eval(node)
+    except ValueError:
+        raise DynamicModule(ast.dump(node))
+
+
+def signature_from_ast(function):
+    """inspect.Signature for a function definition, without importing it."""
+    arguments = function.args
+    positional = arguments.posonlyargs + arguments.args
+    defaults = [inspect.Parameter.empty] * (len(positional) - len(arguments.defaults))
+    defaults += [literal(default) for default in arguments.defaults]
+    parameters = [
+        inspect.Parameter(
+            argument.arg,
+            inspect.Parameter.POSITIONAL_ONLY if argument in arguments.posonlyargs
+            else inspect.Parameter.POSITIONAL_OR_KEYWORD,
+            default=default)
+        for argument, default in zip(positional, defaults)
+    ]
+    if arguments.vararg:
+        parameters.append(inspect.Parameter(
+            arguments.vararg.arg, inspect.Parameter.VAR_POSITIONAL))
+    return inspect.Signature(parameters)
+
+
+def parse_block_module(file_path):
+    """Read BLOCKS/RESOURCES of a block module from its source.
+
+    Returns {"blocks": {name: {"signature": ..., "options": {...}}},
+    "resources": (...)} and raises DynamicModule when BLOCKS is not a plain
+    dict literal of functions defined in the module.
+    """
+    with open(file_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), file_path)
+
+    functions = {node.name: node for node in tree.body
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+    assignments = {target.id: node.value for node in tree.body
+                   if isinstance(node, ast.Assign)
+                   for target in node.targets if isinstance(target, ast.Name)}
+
+    blocks = {}
+    node = assignments.get("BLOCKS")
+    if node is not None:
+        if not isinstance(node, ast.Dict):
+            raise DynamicModule("BLOCKS is not a dict literal")
+        for key, value in zip(node.keys, node.values):
+            options = {}
+            if isinstance(value, ast.Dict):
+                entries = dict(zip((literal(k) for k in value.keys), value.values))
+                value = entries.pop("function", None)
+                options = {name: literal(option) for name, option in entries.items()}
+            if not isinstance(value, ast.Name) or value.id not in functions:
+                raise DynamicModule(f"block {literal(key)!r} is not a module function")
+            blocks[literal(key)] = {
+                "signature": signature_from_ast(functions[value.id]),
+                "options": options,
+            }
+
+    resources = assignments.get("RESOURCES")
+    return {
+        "blocks": blocks,
+        "resources": tuple(literal(resources)) if resources is not None else (),
+    }
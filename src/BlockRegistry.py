@@ -0,0 +1,263 @@
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import importlib
+import inspect
+import logging
+import os
+import threading
+import time
+
+from .BlockManifest import DynamicModule, parse_block_module
+
+# Minimum number of seconds between two stat() sweeps of the blocks directory
+CHECK_INTERVAL = 1.0
+
+# Worker threads shared by all synchronous blocks
+MAX_BLOCK_THREADS = 8
+
+_thread_pool = None
+_process_pool = None
+
+
+def get_executor(kind):
+    global _thread_pool, _process_pool
+    if kind == "process":
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor()
+        return _process_pool
+    if _thread_pool is None:
+        _thread_pool = concurrent.futures.ThreadPoolExecutor(
+            MAX_BLOCK_THREADS, thread_name_prefix="block")
+    return _thread_pool
+
+
+def block_options(entry):
+    """BLOCKS values are either the function itself or a dict such as
+    {"function": f, "executor": "process", "max_concurrency": 1}."""
+    if isinstance(entry, dict):
+        return dict(entry)
+    return {"function": entry}
+
+
+def wrap_block(options):
+    """Turn a registered block into a coroutine function.
+
+    Coroutine functions are awaited as before; plain functions run in the
+    bounded block thread pool, or in a process pool with executor="process"
+    for CPU-heavy work. max_concurrency limits parallel calls of the block;
+    a plain function keeps its slot until its worker actually returns, even
+    when the step timed out or was stopped.
+    """
+    function = options["function"]
+    limit = options.get("max_concurrency")
+    semaphore = asyncio.Semaphore(limit) if limit else None
+    is_coroutine = inspect.iscoroutinefunction(function)
+    kind = options.get("executor", "thread")
+
+    def submit(args):
+        loop = asyncio.get_running_loop()
+        if kind == "process":
+            return loop.run_in_executor(get_executor(kind), function, *args)
+        # Copy the context so records logged from the thread keep their step tag
+        context = contextvars.copy_context()
+        return loop.run_in_executor(
+            get_executor(kind), functools.partial(context.run, function, *args))
+
+    async def wait(future):
+        # A worker cannot be interrupted: a timeout or Stop only ends the wait
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.done():
+                logging.warning(f"Block {function.__name__} was cancelled but is still "
+                                f"running in the {kind} pool")
+            raise
+
+    if semaphore is None and is_coroutine:
+        return function
+
+    @functools.wraps(function)
+    async def block(*args):
+        if is_coroutine:
+            async with semaphore:
+                return await function(*args)
+        if semaphore is None:
+            return await wait(submit(args))
+        await semaphore.acquire()
+        try:
+            future = submit(args)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot stays taken until the worker returns, not until the caller gives up
+        future.add_done_callback(lambda _: semaphore.release())
+        return await wait(future)
+
+    return block
+
+
+class LazyBlock:
+    """Palette entry for a block whose module may not be imported yet.
+
+    The signature comes from the module manifest; the module itself is
+    imported in a worker thread the first time the block runs.
+    """
+
+    def __init__(self, registry, module_name, block_name, signature):
+        self.registry = registry
+        self.module_name = module_name
+        self.block_name = block_name
+        self.__signature__ = signature
+
+    async def __call__(self, *args):
+        function = await self.registry.resolve(self.module_name, self.block_name)
+        return await function(*args)
+
+
+class BlockRegistry:
+    """Process-wide index of block functions keyed by (module, block).
+
+    Block names, signatures, options and resources are read statically from
+    each module's source, so building the palette imports nothing. A module
+    is imported (and its hardware handles created) on first execution.
+    """
+
+    def __init__(self, directory='blocks'):
+        self.directory = directory
+        self._lock = threading.RLock()
+        self._modules = {}
+        self._manifests = {}
+        self._blocks = {}
+        self._index = {}
+        self._functions = {}
+        self._snapshot = None
+        self._last_check = 0.0
+
+    def _scan(self):
+        snapshot = {}
+        for file in os.listdir(self.directory):
+            if file.endswith('.py') and file != '__init__.py':
+                stat = os.stat(os.path.join(self.directory, file))
+                snapshot[file[:-3]] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def _is_stale(self):
+        now = time.monotonic()
+        if self._snapshot is not None and now - self._last_check < CHECK_INTERVAL:
+            return False
+        self._last_check = now
+        return self._scan() != self._snapshot
+
+    def _manifest_from_module(self, module):
+        return {
+            "blocks": {
+                block_name: {"signature": inspect.signature(options["function"]),
+                             "options": {key: value for key, value in options.items()
+                                         if key != "function"}}
+                for block_name, options in (
+                    (name, block_options(entry))
+                    for name, entry in getattr(module, 'BLOCKS', {}).items())
+            },
+            "resources": tuple(getattr(module, 'RESOURCES', ())),
+        }
+
+    def _import(self, module_name):
+        module = self._modules.get(module_name)
+        if module is None:
+            module = importlib.import_module(f'{self.directory}.{module_name}')
+        else:
+            logging.info(f"Reloading block module {module_name}")
+            module = importlib.reload(module)
+        self._modules[module_name] = module
+        for block_name, entry in getattr(module, 'BLOCKS', {}).items():
+            self._functions[(module_name, block_name)] = wrap_block(block_options(entry))
+        return module
+
+    def _load(self):
+        snapshot = self._scan()
+        previous = self._snapshot or {}
+        manifests = {}
+        for module_name, signature in snapshot.items():
+            if previous.get(module_name) == signature and module_name in self._manifests:
+                manifests[module_name] = self._manifests[module_name]
+                continue
+            self._functions = {key: function for key, function in self._functions.items()
+                               if key[0] != module_name}
+            try:
+                manifests[module_name] = parse_block_module(
+                    os.path.join(self.directory, f'{module_name}.py'))
+                if module_name in self._modules:
+                    self._import(module_name)
+            except DynamicModule:
+                # BLOCKS is built at runtime, the module has to be imported to list it
+                manifests[module_name] = self._manifest_from_module(
+                    self._import(module_name))
+
+        self._manifests = manifests
+        self._modules = {name: module for name, module in self._modules.items()
+                         if name in manifests}
+        self._blocks = {
+            module_name: {
+                block_name: LazyBlock(self, module_name, block_name, block["signature"])
+                for block_name, block in manifest["blocks"].items()
+            }
+            for module_name, manifest in manifests.items()
+        }
+        self._index = {
+            (module_name, block_name): block
+            for module_name, module_blocks in self._blocks.items()
+            for block_name, block in module_blocks.items()
+        }
+        self._snapshot = snapshot
+        self._last_check = time.monotonic()
+
+    def refresh(self, force=False):
+        """Rebuild the index if a file in the blocks directory changed."""
+        with self._lock:
+            if force or self._snapshot is None or self._is_stale():
+                self._load()
+
+    def load_module(self, module_name):
+        with self._lock:
+            if module_name not in self._modules:
+                logging.info(f"Loading block module {module_name}")
+                self._import(module_name)
+
+    async def resolve(self, module_name, block_name):
+        """The executable (wrapped) function of a block, importing its module
+        in a worker thread on first use so the event loop keeps running."""
+        key = (module_name, block_name)
+        if key not in self._functions:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self.load_module, module_name)
+        if key not in self._functions:
+            raise LookupError(
+                f"Block '{block_name}' from module '{module_name}' not found.")
+        return self._functions[key]
+
+    def all_blocks(self):
+        self.refresh()
+        return self._blocks
+
+    def get(self, module_name, block_name):
+        self.refresh()
+        return self._index.get((module_name, block_name))
+
+    def options(self, module_name, block_name):
+        """Metadata declared for a block in its module's BLOCKS."""
+        self.refresh()
+        block = self._manifests.get(module_name, {}).get("blocks", {}).get(block_name)
+        return block["options"] if block else {}
+
+    def resources(self, module_name):
+        """Hardware sections (see configs/hardware.json) a module drives."""
+        self.refresh()
+        return self._manifests.get(module_name, {}).get("resources", ())
+
+    def contains(self, module_name, block_name):
+        return self.get(module_name, block_name) is not None
+
+
+block_registry = BlockRegistry()
@@ -1,27 +1,22 @@
 from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt, QFileSystemWatcher
+import asyncio
 import json
 import os
 import logging
-import io
 
-from blocks.TTFislog import clear_log, save_log, get_log
 from .CodeBlock import *
+from .Engine import TestEngine, load_test_case
 from .Logging import *
+from .ResultStore import ResultStore
 from .Step import *
+from .TestCaseCatalog import TestCaseCatalog, describe
+from .TestPlan import TestPlan, TestCase, TestStep
+from tools.TraceCapture import get_trace_capture
 
 MAX_ROW_PER_MODULE = 10
-
-
-class CaptureHandler(logging.Handler):
-    def __init__(self):
-        super().__init__()
-        self.logs = io.StringIO()
-
-    def emit(self, record):
-        self.logs.write(self.format(record) + '\n')
-
-    def get_logs(self):
-        return self.logs.getvalue()
+# Seconds the Stop button waits for a cancelled run to wind down
+STOP_TIMEOUT = 10
 
 
 class BlockTab:
@@ -29,9 +24,26 @@ class BlockTab:
         self.parent = parent
         self.containers = []
         self.loaded_test = ""
-        self.refresh_testcase_list()
+        self.step_widgets = {}
+        self.engine = TestEngine(trace=get_trace_capture())
+        self.engine.step_finished.connect(self.on_step_finished)
+        self.engine.run_finished.connect(self.on_run_finished)
+        self.result_store = ResultStore()
+        self.catalog = TestCaseCatalog()
+        self.palette_groups = []
+        self.run_task = None
+        self.setup_testcase_list()
 
     def setup_block_tab(self):
+        self.build_palette()
+        self.setup_block_tab_scroll_area()
+
+    def build_palette(self):
+        for group_box in self.palette_groups:
+            self.parent.block_layout.removeWidget(group_box)
+            group_box.deleteLater()
+        self.palette_groups = []
+
         for module_name, module_blocks in get_all_blocks().items():
             group_box = QtWidgets.QGroupBox(module_name)
             group_layout = QtWidgets.QGridLayout()
@@ -48,8 +60,16 @@ class BlockTab:
 
             group_box.setLayout(group_layout)
             self.parent.block_layout.addWidget(group_box)
+            self.palette_groups.append(group_box)
 
-        # Setup scroll area
+    def refresh(self):
+        """Pick up block and test case changes without rebuilding the window."""
+        block_registry.refresh(force=True)
+        self.build_palette()
+        self.catalog.refresh()
+        self.refresh_testcase_list()
+
+    def setup_block_tab_scroll_area(self):
         scroll_area = QtWidgets.QScrollArea(self.parent)
         scroll_area.setWidgetResizable(True)
 
@@ -62,11 +82,43 @@ class BlockTab:
             scroll_area)  # Set scroll_area as widget
         self.add_test_case()  # Add the first container
 
+    def setup_testcase_list(self):
+        """Searchable test case combo box kept in sync with the catalog."""
+        combo = self.parent.testcase_list
+        combo.setEditable(True)
+        combo.setInsertPolicy(QtWidgets.QComboBox.NoInsert)
+        completer = combo.completer()
+        completer.setFilterMode(Qt.MatchContains)
+        completer.setCaseSensitivity(Qt.CaseInsensitive)
+        completer.setCompletionMode(QtWidgets.QCompleter.PopupCompletion)
+        self.testcase_watcher = QFileSystemWatcher([self.catalog.directory], self.parent)
+        self.testcase_watcher.directoryChanged.connect(self.on_testcases_changed)
+        self.refresh_testcase_list()
+
+    def on_testcases_changed(self, directory):
+        if self.catalog.refresh():
+            self.refresh_testcase_list()
+
     def refresh_testcase_list(self):
-        self.parent.testcase_list.clear()
-        testcases = [file[:-5].capitalize().replace("_", " ")
-                     for file in os.listdir('testcases') if file.endswith('.json')]
-        self.parent.testcase_list.addItems(testcases)
+        combo = self.parent.testcase_list
+        current = combo.currentData()
+        combo.blockSignals(True)
+        combo.clear()
+        for entry in self.catalog.sorted_entries():
+            combo.addItem(entry["name"], entry["path"])
+            combo.setItemData(combo.count() - 1, describe(entry), Qt.ToolTipRole)
+        index = combo.findData(current)
+        if index >= 0:
+            combo.setCurrentIndex(index)
+        combo.blockSignals(False)
+
+    def selected_test_case(self):
+        """Path of the test case picked or typed in the combo box."""
+        combo = self.parent.testcase_list
+        index = combo.currentIndex()
+        if index < 0 or combo.itemText(index) != combo.currentText():
+            index = combo.findText(combo.currentText(), Qt.MatchFixedString)
+        return combo.itemData(index) if index >= 0 else None
 
     def add_step(self, container=None, with_placeholder=True):
         if container is None:
@@ -85,14 +137,14 @@ class BlockTab:
         self.add_test_case()  # Add a new empty container after clearing
 
     def remove_code(self):
-        testcase_name = self.parent.testcase_list.currentText().lower().replace(" ", "_")
-        file_path = os.path.join("testcases", f"{testcase_name}.json")
-        if os.path.exists(file_path):
+        file_path = self.selected_test_case()
+        if file_path and os.path.exists(file_path):
             os.remove(file_path)
             logging.info(f"File {file_path} has been deleted")
+            self.catalog.update_path(file_path)
             self.refresh_testcase_list()
         else:
-            logging.info(f"File {file_path} does not exist")
+            logging.info(f"Test case {self.parent.testcase_list.currentText()} does not exist")
 
     def export_code(self):
         test_case_name, ok = QtWidgets.QInputDialog.getText(
@@ -103,29 +155,18 @@ class BlockTab:
                 "Export Error. Please enter a valid test case name.")
             return
 
-        export_data = {
-            "containers": [
-                {
-                    "name": container.name_input.text(),
-                    "steps": [
-                        {"module": step.block.module_name,
-                            "block": step.block.block_name}
-                        for step in container.findChildren(Step) if step.block
-                    ]
-                }
-                for container in self.containers
-            ]
-        }
+        export_data = self.build_test_plan().to_dict()
 
         file_path = self.save_test_case(
             test_case_name.replace(" ", "_").lower(), export_data)
         if file_path:
             logging.info(f"Code exported to {file_path}")
+            self.catalog.update_path(file_path)
             self.refresh_testcase_list()
 
     def save_test_case(self, test_case_name, export_data):
-        os.makedirs("testcases", exist_ok=True)
-        file_path = os.path.join("testcases", f"{test_case_name}.json")
+        os.makedirs(self.catalog.directory, exist_ok=True)
+        file_path = os.path.join(self.catalog.directory, f"{test_case_name}.json")
         try:
             with open(file_path, "w") as f:
                 json.dump(export_data, f, indent=2)
@@ -135,118 +176,120 @@ class BlockTab:
             return None
 
     def import_code(self):
-        testcase_name = self.parent.testcase_list.currentText().lower()
-        file_path = os.path.join("testcases", f"{testcase_name}.json")
-        if os.path.exists(file_path):
+        file_path = self.selected_test_case()
+        if file_path and os.path.exists(file_path):
             try:
-                with open(file_path, "r") as f:
-                    import_data = json.load(f)
-                self.load_test_case(file_path, import_data)
+                self.load_test_case(file_path, load_test_case(file_path))
             except (IOError, json.JSONDecodeError) as e:
                 logging.error(f"Error importing test case: {e}")
         else:
-            logging.error(f"File not found: {file_path}")
+            logging.error(f"Test case not found: {self.parent.testcase_list.currentText()}")
 
-    def load_test_case(self, file_path, import_data):
+    def load_test_case(self, file_path, plan):
         self.clear_steps()
-        test_case_name = os.path.splitext(os.path.basename(file_path))[0]
-        self.test_case_name_input = QLabel(test_case_name)
+        self.test_case_name_input = QLabel(plan.name)
 
         if self.containers:
             self.containers[0].deleteLater()
             self.containers.pop(0)
 
-        for container_data in import_data.get("containers", []):
+        for case in plan.cases:
             new_container = self.add_test_case()
-            new_container.name_input.setText(
-                container_data.get("name", "Unnamed Test Case"))
+            new_container.name_input.setText(case.name)
             first_step = True
-            for step_data in container_data.get("steps", []):
-                module_name = step_data.get("module")
-                block_name = step_data.get("block")
-                if module_name in get_all_blocks() and block_name in get_all_blocks()[module_name]:
+            for test_step in case.steps:
+                if block_registry.contains(test_step.module, test_step.block):
                     if first_step:
                         # Replace the placeholder in the first step
-                        first_step_widget = new_container.layout.itemAt(
+                        step = new_container.layout.itemAt(
                             1).widget()  # Changed from 0 to 1
-                        first_step_widget.add_block(
-                            f"{module_name}:{block_name}")
                         first_step = False
                     else:
                         step = Step(with_placeholder=False,
                                     parent=self.parent, container=new_container)
                         new_container.layout.addWidget(step)
-                        step.add_block(f"{module_name}:{block_name}")
+                    step.add_block(f"{test_step.module}:{test_step.block}")
+                    step.block.set_inputs(test_step.inputs)
                 else:
                     logging.warning(
-                        f"Block '{block_name}' from module '{module_name}' not found.")
+                        f"Block '{test_step.block}' from module '{test_step.module}' not found.")
 
             new_container.update()
         self.loaded_test = file_path
         logging.info(f"Code imported from {file_path}")
 
+    def container_steps(self, container):
+        """Steps of a container in layout order, without a recursive findChildren."""
+        layout = container.layout
+        widgets = (layout.itemAt(index).widget() for index in range(layout.count()))
+        return [widget for widget in widgets
+                if isinstance(widget, Step) and widget.block]
+
+    def build_test_plan(self):
+        """Snapshot the containers into a TestPlan and remember which widget
+        each planned step came from, so progress signals can colour it."""
+        plan = TestPlan(name=os.path.splitext(os.path.basename(self.loaded_test))[0])
+        self.step_widgets = {}
+        for case_index, container in enumerate(self.containers, 1):
+            case = TestCase(container.name_input.text())
+            for step_index, step in enumerate(self.container_steps(container), 1):
+                case.steps.append(TestStep(
+                    step.block.module_name, step.block.block_key, list(step.block.function_inputs)))
+                self.step_widgets[(case_index, step_index)] = step
+            plan.cases.append(case)
+        return plan
+
+    def on_step_finished(self, case_index, step_index, success):
+        step = self.step_widgets.get((case_index, step_index))
+        if step is not None:
+            step.set_color("lightgreen" if success else "lightcoral")
+
+    def start_run(self):
+        """Run the current test cases unless a run is already in progress."""
+        if self.run_task is not None and not self.run_task.done():
+            logging.warning("A run is already in progress")
+            return
+        self.run_task = asyncio.create_task(self.run_code())
+        self.parent.run_btn.setEnabled(False)
+        self.parent.stop_btn.setEnabled(True)
+        self.run_task.add_done_callback(self.on_run_done)
+
+    def on_run_done(self, task):
+        self.parent.run_btn.setEnabled(True)
+        self.parent.stop_btn.setEnabled(False)
+
+    async def stop_run(self):
+        if self.run_task is None or self.run_task.done():
+            return
+        logging.info("Stopping run...")
+        self.run_task.cancel()
+        done, _ = await asyncio.wait({self.run_task}, timeout=STOP_TIMEOUT)
+        if not done:
+            logging.error(f"Run did not stop within {STOP_TIMEOUT}s")
+
+    def on_run_finished(self, run_id, success):
+        if self.loaded_test:
+            self.catalog.record_result(self.loaded_test, success)
+            self.refresh_testcase_list()
+
     async def run_code(self):
-        test_results = {}
-        await clear_log()
         try:
-            for container_index, container in enumerate(self.containers, 1):
-                container_name = container.name_input.text()
-                container_results = {}
-                logging.info(f"Running Test Case: {container_name}")
-                for step_index, step in enumerate(container.findChildren(Step), 1):
-                    if step.block:
-                        try:
-                            logging.info(
-                                f"Executing step {step_index}: {step.block.block_name}")
-
-                            # Set up capture handler
-                            capture_handler = CaptureHandler()
-                            capture_handler.setFormatter(logging.Formatter(
-                                '%(asctime)s - %(levelname)s - %(message)s'))
-                            logging.getLogger().addHandler(capture_handler)
-
-                            # Execute the function
-                            result = await step.block.function(*step.block.function_inputs)
-                            aurix_log = get_log()
-                            # Get captured logs
-                            step_logs = capture_handler.get_logs()
-                            logging.getLogger().removeHandler(capture_handler)
-
-                            success = result is not False
-                            log_message = f"Step {step_index}: {step.block.block_name} executed successfully" if success else f"Error executing step {step_index} ({step.block.block_name}) with: {result}"
-
-                            container_results[f"Step {step_index}"] = {
-                                'success': success,
-                                'log': step_logs + log_message + aurix_log
-                            }
-
-                            if success:
-                                step.set_color("lightgreen")
-                                logging.info(log_message)
-                            else:
-                                step.set_color("lightcoral")
-                                logging.critical(log_message)
-                                break
-
-                        except Exception as e:
-                            error_message = f"Exception occurred during step {step_index}: {e}"
-                            container_results[f"Step {step_index}"] = {
-                                'success': False,
-                                'log': error_message + aurix_log
-                            }
-                            logging.error(error_message)
-                            step.set_color("lightcoral")
-                            break
-
-                test_results[f"Test Case {container_index}: {container_name}"] = container_results
-                logging.info(f"Finished Test Case {container_index}")
-                file_name = container_name.replace(" ", "_")
-                await save_log(f"D:\\Python\\AutomationGui\\ttfis_log\\{file_name}.pro")
-                await clear_log()
+            report = open_test_results_html(self.engine.trace)
+            self.engine.case_finished.connect(report.write_test_case_at)
+            self.result_store.attach(self.engine, report)
+            try:
+                await self.engine.run(self.build_test_plan())
+            except asyncio.CancelledError:
+                logging.warning("Run stopped, writing a partial report")
+            finally:
+                self.result_store.detach(self.engine)
+                self.engine.case_finished.disconnect(report.write_test_case_at)
+                # Waits for trace artifacts still being written
+                await asyncio.get_running_loop().run_in_executor(None, report.close)
             import webbrowser
             import os
-            file_path = os.path.abspath(
-                generate_test_results_html(test_results))
+            file_path = os.path.abspath(report.output_file)
+            logging.info(f"Test results saved to {report.output_file}")
 
             # Open the HTML file in the default web browser
             webbrowser.open(f'file://{file_path}')
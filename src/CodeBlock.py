@@ -1,34 +1,22 @@
 from PyQt5.QtCore import Qt, QMimeData
 from PyQt5.QtGui import QDrag
 from PyQt5.QtWidgets import QPushButton, QInputDialog, QFileDialog
-import os
-import importlib
 import inspect
 
+from .BlockRegistry import BlockRegistry, block_registry
 
-def get_all_blocks(directory='blocks'):
-    block_modules = {}
-
-    # Import all block modules
-    for file in os.listdir(directory):
-        if file.endswith('.py') and file != '__init__.py':
-            module_name = file[:-3]
-            block_modules[module_name] = importlib.import_module(
-                f'{directory}.{module_name}')
-
-    # Collect BLOCKS from each module
-    blocks = {
-        module_name: getattr(module, 'BLOCKS', {})
-        for module_name, module in block_modules.items()
-    }
 
-    return blocks
+def get_all_blocks(directory='blocks'):
+    if directory != block_registry.directory:
+        return BlockRegistry(directory).all_blocks()
+    return block_registry.all_blocks()
 
 
 class CodeBlock(QPushButton):
     def __init__(self, text, function, module_name, parent=None):
         super().__init__(text, parent)
         self.block_name = text
+        self.block_key = text
         self.function = function
         self.module_name = module_name
         self.function_inputs = []
@@ -40,23 +28,29 @@ class CodeBlock(QPushButton):
         if e.buttons() == Qt.LeftButton:
             drag = QDrag(self)
             mime = QMimeData()
-            mime.setText(f"{self.module_name}:{self.block_name}")
+            mime.setText(f"{self.module_name}:{self.block_key}")
             drag.setMimeData(mime)
             drag.exec_(Qt.CopyAction | Qt.MoveAction)
 
     def mouseDoubleClickEvent(self, e):
-        import re
         if e.button() == Qt.LeftButton and type(self).__name__ == "CodeBlock":
             if self.prepare_input():
-                text = re.findall(r'\((.*?)\)', self.block_name)
+                self.set_inputs(self.function_inputs)
 
-                new_block_name = self.block_name
-                for item in text:
-                    new_block_name = new_block_name.replace(
-                        f'({item})', f'({str(self.function_inputs)})')
+    def set_inputs(self, inputs):
+        import re
+        self.function_inputs = list(inputs)
+        if not self.function_inputs:
+            return
+        text = re.findall(r'\((.*?)\)', self.block_name)
+
+        new_block_name = self.block_name
+        for item in text:
+            new_block_name = new_block_name.replace(
+                f'({item})', f'({str(self.function_inputs)})')
 
-                self.block_name = new_block_name
-                self.setText(new_block_name)
+        self.block_name = new_block_name
+        self.setText(new_block_name)
 
     def requires_input(self):
         signature = inspect.signature(self.function)
@@ -67,12 +61,15 @@ class CodeBlock(QPushButton):
             inputs = []
             signature = inspect.signature(self.function)
 
-            for param in signature.parameters:
+            for param, parameter in signature.parameters.items():
                 if "path" in param or "file" in param:
                     file_path = QFileDialog.getOpenFileName(
-                        self, 'Select File', '', '*.pro')[0]
+                        self, 'Select File', '', 'Trace files (*.pro *.log);;All files (*)')[0]
                     if file_path:
                         inputs.append(file_path)
+                    elif parameter.default is not inspect.Parameter.empty:
+                        # Optional file: cancelling keeps the block's default
+                        inputs.append(parameter.default)
                     else:
                         return False  # User canceled the dialog
                 else:
@@ -81,6 +78,11 @@ class CodeBlock(QPushButton):
                     if ok:
                         # Handle as an integer input, modify as needed
                         inputs.append(value)
+                    elif parameter.default is not inspect.Parameter.empty:
+                        # Keep later inputs in their own positions
+                        inputs.append(parameter.default)
+                    else:
+                        return False  # User canceled the dialog
 
             self.function_inputs = inputs
             return True
@@ -0,0 +1,216 @@
+import asyncio
+import functools
+import inspect
+import json
+import logging
+import os
+import time
+import uuid
+
+from tools.Profiler import profiler
+
+from .BlockRegistry import LazyBlock, block_registry, block_options, wrap_block
+from .Logging import install_log_store
+from .LogStore import log_context, set_log_context
+from .Scheduler import ResourceLocks, run_concurrently
+from .TestPlan import TestPlan
+
+# Seconds a step may run unless its block declares "timeout" in BLOCKS
+STEP_TIMEOUT = 600
+# Seconds a whole run may take; None for no limit
+RUN_TIMEOUT = None
+
+
+class Signal:
+    """Minimal callback list so the engine can report progress without Qt."""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot):
+        self._slots.remove(slot)
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+def load_test_case(file_path):
+    with open(file_path, "r") as f:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        return TestPlan.from_dict(json.load(f), name)
+
+
+async def execute_block(function, inputs):
+    """Blocks from the registry are coroutine functions (synchronous ones are
+    wrapped for an executor at load time); anything else is wrapped here."""
+    if not (inspect.iscoroutinefunction(function) or isinstance(function, LazyBlock)):
+        function = wrap_block(block_options(function))
+    result = await function(*inputs)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+class TestEngine:
+    """Executes a TestPlan and reports progress through signals.
+
+    run_started(run_id, plan)
+    step_started(case_index, step_index)
+    step_finished(case_index, step_index, success)
+    step_result(run_id, case_index, step_index, test_case, step, result)
+    case_finished(case_index, test_case, case_results)
+    run_finished(run_id, success)
+    """
+
+    def __init__(self, registry=block_registry, trace=None,
+                 step_timeout=STEP_TIMEOUT, run_timeout=RUN_TIMEOUT):
+        self.registry = registry
+        self.trace = trace
+        self.step_timeout = step_timeout
+        self.run_timeout = run_timeout
+        self.run_id = None
+        self.test_cases = {}
+        self.step_logs = install_log_store()
+        self.run_started = Signal()
+        self.step_started = Signal()
+        self.step_finished = Signal()
+        self.step_result = Signal()
+        self.case_finished = Signal()
+        self.run_finished = Signal()
+
+    async def run(self, plan):
+        """Run every test case of the plan, sharing hardware through locks.
+
+        Returns the results keyed by test case and step name. When the run
+        deadline passes the remaining steps are cancelled and the results so
+        far are returned; a cancelled run still reports what it finished.
+        """
+        test_results = {}
+        self.run_id = f"{plan.name or 'run'}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}"
+        profiler.start_run()
+        self.run_started.emit(self.run_id, plan)
+        if self.trace:
+            await self.trace.start()
+        locks = ResourceLocks()
+        jobs = []
+        for case_index, case in enumerate(plan.cases, 1):
+            case_results = {}
+            # Reserve the slot now so the report keeps test case order
+            test_results[f"Test Case {case_index}: {case.name}"] = case_results
+            resources = [resource
+                         for module_name in {step.module for step in case.steps}
+                         for resource in self.registry.resources(module_name)]
+            jobs.append((locks.resource_keys(resources), functools.partial(
+                self.run_case, case_index, case, case_results)))
+        self.test_cases = {case_index: test_case
+                           for case_index, test_case in enumerate(test_results, 1)}
+
+        completed = False
+        try:
+            await asyncio.wait_for(run_concurrently(jobs, locks), self.run_timeout)
+            completed = True
+        except asyncio.TimeoutError:
+            logging.error(f"Run {self.run_id} exceeded its {self.run_timeout}s deadline")
+        finally:
+            self.step_logs.discard(self.run_id)
+            self.save_profile()
+            self.run_finished.emit(self.run_id, completed and all_passed(test_results))
+        return test_results
+
+    def save_profile(self):
+        try:
+            os.makedirs("test_results", exist_ok=True)
+            trace_file = profiler.export_chrome_trace(
+                os.path.join("test_results", f"trace_{self.run_id}.json"))
+            profiler.save_histograms()
+            profiler.log_summary()
+            logging.info(f"Run timeline saved to {trace_file}")
+        except (IOError, ValueError) as e:
+            logging.error(f"Error saving run profile: {e}")
+
+    async def run_case(self, case_index, case, case_results):
+        logging.info(f"Running Test Case: {case.name}")
+        try:
+            with profiler.span(case.name, "test case"):
+                for step_index, step in enumerate(case.steps, 1):
+                    if not await self.run_step(case_index, step_index, step, case_results):
+                        break
+            logging.info(f"Finished Test Case {case_index}")
+        finally:
+            self.case_finished.emit(
+                case_index, self.test_cases[case_index], case_results)
+
+    async def run_step(self, case_index, step_index, step, case_results):
+        self.step_started.emit(case_index, step_index)
+        log_key = (self.run_id, f"Test Case {case_index}", f"Step {step_index}")
+        context_token = set_log_context(*log_key)
+        function = self.registry.get(step.module, step.block)
+        timeout = self.registry.options(step.module, step.block).get("timeout", self.step_timeout)
+        cancelled = False
+        started = time.time()
+        start = time.monotonic()
+        trace_range = None
+        deadline = None
+        if self.trace:
+            trace_start = self.trace.mark_step(self.run_id, case_index, step_index, "start")
+        try:
+            logging.info(f"Executing step {step_index}: {step.block}")
+            if function is None:
+                raise LookupError(
+                    f"Block '{step.block}' from module '{step.module}' not found.")
+            with profiler.span(step.block, "step", module=step.module, step=step_index):
+                async with asyncio.timeout(timeout) as deadline:
+                    result = await execute_block(function, step.inputs)
+            success = result is not False
+            log_message = f"Step {step_index}: {step.block} executed successfully" if success else f"Error executing step {step_index} ({step.block}) with: {result}"
+            if success:
+                logging.info(log_message)
+            else:
+                logging.critical(log_message)
+        except TimeoutError as e:
+            success = False
+            if deadline is not None and deadline.expired():
+                logging.error(f"Step {step_index} ({step.block}) timed out after {timeout}s")
+            else:
+                # Raised by the block itself, e.g. a device query timing out
+                logging.error(f"Exception occurred during step {step_index}: {e!r}")
+        except asyncio.CancelledError:
+            success = False
+            cancelled = True
+            logging.error(f"Step {step_index} ({step.block}) cancelled")
+        except Exception as e:
+            success = False
+            log_message = f"Exception occurred during step {step_index}: {e}"
+            logging.error(log_message)
+        finally:
+            log_context.reset(context_token)
+            if self.trace:
+                trace_range = (trace_start,
+                               self.trace.mark_step(self.run_id, case_index, step_index, "end"))
+
+        duration = time.monotonic() - start
+        profiler.add_block_duration(f"{step.module}.{step.block}", duration)
+        result = {
+            'success': success,
+            'log': self.step_logs.text(*log_key),
+            'trace': trace_range,
+            'started': started,
+            'finished': time.time(),
+            'duration': duration
+        }
+        case_results[f"Step {step_index}"] = result
+        self.step_finished.emit(case_index, step_index, success)
+        self.step_result.emit(self.run_id, case_index, step_index,
+                              self.test_cases[case_index], step, result)
+        if cancelled:
+            raise asyncio.CancelledError()
+        return success
+
+
+def all_passed(test_results):
+    return all(step['success']
+               for steps in test_results.values() for step in steps.values())
@@ -0,0 +1,165 @@
+import collections
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+
+# (run_id, test case, step) of the code that is currently logging
+log_context = contextvars.ContextVar("log_context", default=(None, None, None))
+
+
+def set_log_context(run_id=None, case=None, step=None):
+    return log_context.set((run_id, case, step))
+
+
+class StoredRecord:
+    __slots__ = ("seq", "created", "level", "message", "run_id", "case", "step")
+
+    def __init__(self, seq, created, level, message, run_id=None, case=None, step=None):
+        self.seq = seq
+        self.created = created
+        self.level = level
+        self.message = message
+        self.run_id = run_id
+        self.case = case
+        self.step = step
+
+    def to_list(self):
+        return [self.seq, self.created, self.level, self.message,
+                self.run_id, self.case, self.step]
+
+    def format(self):
+        """The record as the console shows it."""
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created))
+        return f"{stamp},{int(self.created % 1 * 1000):03d} - {self.level} - {self.message}"
+
+
+class LogStore:
+    """Fixed-size ring of log records with a (run, case, step) index.
+
+    Records pushed out of the ring are dropped, or, when spill_path is
+    given and they belong to a run, appended to it so they can still be
+    paged through from disk. discard() forgets a finished run; the spill
+    file is emptied once no run refers to it.
+    """
+
+    def __init__(self, capacity=20000, spill_path=None):
+        self.capacity = capacity
+        self.spill_path = spill_path
+        self._ring = [None] * capacity
+        self._next_seq = 0
+        self._index = collections.defaultdict(collections.deque)
+        self._spill_index = collections.defaultdict(list)
+        self._spill_file = None
+        self._discarded = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return min(self._next_seq, self.capacity)
+
+    @property
+    def first_seq(self):
+        """Oldest sequence number still held in memory."""
+        return max(0, self._next_seq - self.capacity)
+
+    def append(self, created, level, message, run_id=None, case=None, step=None):
+        with self._lock:
+            seq = self._next_seq
+            slot = seq % self.capacity
+            evicted = self._ring[slot]
+            if evicted is not None:
+                self._evict(evicted)
+            record = StoredRecord(seq, created, level, message, run_id, case, step)
+            self._ring[slot] = record
+            self._index[(run_id, case, step)].append(seq)
+            self._next_seq += 1
+            return seq
+
+    def _evict(self, record):
+        key = (record.run_id, record.case, record.step)
+        seqs = self._index[key]
+        seqs.popleft()
+        if not seqs:
+            del self._index[key]
+        if self.spill_path and record.run_id is not None and record.run_id not in self._discarded:
+            if self._spill_file is None:
+                os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+                self._spill_file = open(self.spill_path, "w+", encoding="utf-8")
+            self._spill_file.seek(0, 2)
+            self._spill_index[key].append(self._spill_file.tell())
+            self._spill_file.write(json.dumps(record.to_list()) + "\n")
+
+    def _read_spilled(self, offsets):
+        self._spill_file.flush()
+        with open(self.spill_path, "r", encoding="utf-8") as f:
+            for offset in offsets:
+                f.seek(offset)
+                yield StoredRecord(*json.loads(f.readline()))
+
+    def _keys(self, index, run_id, case, step):
+        return [key for key in index
+                if (run_id is None or key[0] == run_id)
+                and (case is None or key[1] == case)
+                and (step is None or key[2] == step)]
+
+    def query(self, run_id=None, case=None, step=None, offset=0, limit=None):
+        """Records matching the given tags in logging order, paged by
+        offset/limit. Spilled records come first when a spill file is used."""
+        with self._lock:
+            spilled = sorted(offset_
+                             for key in self._keys(self._spill_index, run_id, case, step)
+                             for offset_ in self._spill_index[key])
+            seqs = sorted(seq
+                          for key in self._keys(self._index, run_id, case, step)
+                          for seq in self._index[key])
+            end = None if limit is None else offset + limit
+            records = []
+            if offset < len(spilled):
+                records.extend(self._read_spilled(spilled[offset:end]))
+            memory_offset = max(0, offset - len(spilled))
+            memory_end = None if end is None else max(0, end - len(spilled))
+            records.extend(self._ring[seq % self.capacity]
+                           for seq in seqs[memory_offset:memory_end])
+            return records
+
+    def text(self, run_id=None, case=None, step=None):
+        """Formatted lines of the matching records, one per line."""
+        return "".join(f"{record.format()}\n" for record in self.query(run_id, case, step))
+
+    def discard(self, run_id):
+        """Drop the spilled records of a finished run; its records still in
+        the ring age out as usual."""
+        with self._lock:
+            self._discarded.add(run_id)
+            for key in self._keys(self._spill_index, run_id, None, None):
+                del self._spill_index[key]
+            if not self._spill_index and self._spill_file is not None:
+                self._spill_file.seek(0)
+                self._spill_file.truncate()
+
+    def close(self):
+        with self._lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+                try:
+                    os.remove(self.spill_path)
+                except OSError as e:
+                    logging.warning(f"Could not remove log spill file {self.spill_path}: {e}")
+
+
+class LogStoreHandler(logging.Handler):
+    """Feeds every record into a LogStore, tagged with the current log_context."""
+
+    def __init__(self, store):
+        super().__init__()
+        self.store = store
+        # Keeps tracebacks of logging.exception() with the message
+        self.setFormatter(logging.Formatter("%(message)s"))
+
+    def emit(self, record):
+        run_id, case, step = log_context.get()
+        self.store.append(record.created, record.levelname,
+                          self.format(record), run_id, case, step)
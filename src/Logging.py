@@ -1,9 +1,24 @@
+import atexit
+import base64
+import collections
+import concurrent.futures
+import gzip
 import logging
 import os
+import threading
 import time
 
-# List to store log entries
-log_entries = []
+from .LogStore import LogStore, LogStoreHandler, log_context
+
+# Bounded store of every log record, queryable by run/test case/step. Records
+# of a run that age out of memory spill to a per-process file until the run
+# is discarded.
+log_store = LogStore(spill_path=os.path.join("test_results", f"log_spill_{os.getpid()}.jsonl"))
+atexit.register(log_store.close)
+
+# Console refresh period and the number of lines it keeps
+FLUSH_INTERVAL_MS = 50
+MAX_CONSOLE_LINES = 5000
 
 logging.basicConfig(
     level=logging.INFO,
@@ -12,37 +27,68 @@ logging.basicConfig(
 
 
 class QTextEditLogger(logging.Handler):
-    def __init__(self, widget):
+    """Console sink that buffers records and writes them to the widget in
+    one insert per timer tick, so bursts of logs don't reflow it per line."""
+
+    def __init__(self, widget, interval=FLUSH_INTERVAL_MS, max_lines=MAX_CONSOLE_LINES):
+        from PyQt5.QtCore import QTimer
         super().__init__()
         self.widget = widget
         self.widget.setReadOnly(True)
+        self.widget.document().setMaximumBlockCount(max_lines)
+        # Older lines would be trimmed by the document anyway
+        self.pending = collections.deque(maxlen=max_lines)
+        self.pending_lock = threading.Lock()
+        self.timer = QTimer(widget)
+        self.timer.timeout.connect(self.flush_pending)
+        self.timer.start(interval)
 
     def emit(self, record):
         msg = self.format(record)
-        self.widget.append(msg)
-        self.widget.ensureCursorVisible()
-        log_entries.append((
-            record.asctime,
-            record.levelname,
-            record.message
-        ))
+        with self.pending_lock:
+            self.pending.append(msg)
 
+    def flush_pending(self):
+        from PyQt5.QtGui import QTextCursor
+        with self.pending_lock:
+            if not self.pending:
+                return
+            lines = list(self.pending)
+            self.pending.clear()
 
-def setup_logging(parent):
-    log_handler = QTextEditLogger(parent.console)
-    log_handler.setFormatter(logging.Formatter(
-        '%(asctime)s - %(levelname)s - %(message)s'))
+        document = self.widget.document()
+        text = "\n".join(lines)
+        cursor = QTextCursor(document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.insertText(text if document.isEmpty() else "\n" + text)
+        scroll_bar = self.widget.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
 
-    logging.getLogger().addHandler(log_handler)
-    logging.getLogger().setLevel(logging.INFO)
+    def close(self):
+        self.timer.stop()
+        super().close()
 
 
-def test_results_to_html(test_results, output_file):
-    """Convert test results to HTML and save to a file."""
-    all_tests_success = True  # Track if all test cases pass
+def install_log_store():
+    root = logging.getLogger()
+    if not any(isinstance(handler, LogStoreHandler) for handler in root.handlers):
+        root.addHandler(LogStoreHandler(log_store))
+    return log_store
 
-    # Start building the HTML content
-    html_content = """
+
+def setup_logging(parent):
+    root = logging.getLogger()
+    if not any(isinstance(handler, QTextEditLogger) and handler.widget is parent.console
+               for handler in root.handlers):
+        log_handler = QTextEditLogger(parent.console)
+        log_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(levelname)s - %(message)s'))
+        root.addHandler(log_handler)
+    install_log_store()
+    logging.getLogger().setLevel(logging.INFO)
+
+
+REPORT_HEADER = """
     <html>
     <head>
         <title>Test Case Results</title>
@@ -59,60 +105,235 @@ def test_results_to_html(test_results, output_file):
             .log { margin-left: 40px; font-family: monospace; white-space: pre-wrap; }
             .success { color: green; }
             .failure { color: red; }
+            .running { color: gray; }
+            .log-summary { margin-left: 40px; color: #555; cursor: pointer; }
+            .log-more { margin-left: 40px; display: none; }
         </style>
         <script>
             function toggleTestCase(element) {
                 element.closest('.test-case').classList.toggle('open');
             }
+            function setFinalStatus(status, statusClass) {
+                var title = document.getElementById('final-status');
+                title.textContent = 'Test Case Results - ' + status;
+                title.className = statusClass;
+            }
+            // Step logs live in gzip+base64 chunk scripts next to the report and
+            // are only loaded when expanded (script tags also work from file://)
+            function loadLogChunk(stepId, index) {
+                var log = document.getElementById('log-' + stepId);
+                var script = document.createElement('script');
+                script.src = log.dataset.src + '/chunk_' + index + '.js';
+                document.body.appendChild(script);
+            }
+            function logChunk(stepId, index, last, data) {
+                var bytes = Uint8Array.from(atob(data), function (c) { return c.charCodeAt(0); });
+                var stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('gzip'));
+                new Response(stream).text().then(function (text) {
+                    document.getElementById('log-' + stepId).textContent += text;
+                    var more = document.getElementById('more-' + stepId);
+                    more.dataset.next = index + 1;
+                    more.style.display = last ? 'none' : 'inline';
+                });
+            }
+            function toggleLog(stepId) {
+                var log = document.getElementById('log-' + stepId);
+                if (!log.dataset.loaded) {
+                    log.dataset.loaded = '1';
+                    loadLogChunk(stepId, 0);
+                }
+                log.style.display = log.style.display === 'none' ? 'block' : 'none';
+            }
+            function loadMoreLog(stepId) {
+                loadLogChunk(stepId, parseInt(document.getElementById('more-' + stepId).dataset.next));
+            }
         </script>
     </head>
     <body>
+    <h1 id="final-status" class="running">Test Case Results - RUNNING</h1>
+    """
+
+REPORT_FOOTER = """
+    </body>
+    </html>
     """
 
-    # Check if all test cases pass
-    for test_case, steps in test_results.items():
+HTML_ESCAPE_TABLE = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'})
+
+
+# Uncompressed bytes per lazily loaded log chunk
+LOG_CHUNK_SIZE = 256 * 1024
+
+
+def escape_html(text):
+    """Escape special characters in a single pass."""
+    return text.translate(HTML_ESCAPE_TABLE)
+
+
+def split_log_chunks(blocks, chunk_size=LOG_CHUNK_SIZE):
+    """Re-split a stream of encoded log blocks into chunks of about
+    chunk_size, cutting after a newline when possible."""
+    buffer = b''
+    for block in blocks:
+        buffer += block
+        while len(buffer) >= chunk_size:
+            newline = buffer.rfind(b'\n', 0, chunk_size)
+            end = newline + 1 if newline >= 0 else chunk_size
+            yield buffer[:end]
+            buffer = buffer[end:]
+    if buffer:
+        yield buffer
+
+
+def write_log_artifact(step_id, blocks, directory):
+    """Store a step log as gzip-compressed chunk scripts in directory.
+
+    blocks is an iterable of encoded log data and is consumed one chunk at
+    a time. Returns the number of bytes and lines written.
+    """
+    os.makedirs(directory, exist_ok=True)
+    size = lines = 0
+    chunks = split_log_chunks(blocks)
+    chunk = next(chunks, b'')
+    index = 0
+    while chunk is not None:
+        # Look one chunk ahead so the page knows when there is no more
+        next_chunk = next(chunks, None)
+        size += len(chunk)
+        lines += chunk.count(b'\n')
+        data = base64.b64encode(gzip.compress(chunk)).decode('ascii')
+        with open(os.path.join(directory, f'chunk_{index}.js'), 'w', encoding='ascii') as f:
+            f.write(f'logChunk("{step_id}", {index}, {"false" if next_chunk is not None else "true"}, "{data}");\n')
+        chunk = next_chunk
+        index += 1
+    return size, lines
+
+
+class HtmlReportWriter:
+    """Writes the test result report incrementally, one test case at a time,
+    so the file can be opened while the run is still going.
+
+    Step logs are written as compressed artifacts in <report>_logs/ and the
+    page itself only carries a summary of each, so its size does not depend
+    on how long the logs are. With a trace capture, the TTFis trace range of
+    each step is streamed from the capture into its log artifact.
+
+    Writing happens on a single worker thread, in submission order, so the
+    case_finished slot returns immediately even for long traces.
+    """
+
+    def __init__(self, output_file, trace=None):
+        self.output_file = output_file
+        self.trace = trace
+        self.log_dir = os.path.splitext(output_file)[0] + "_logs"
+        self.case_count = 0
+        self.run_count = 0
+        self.all_tests_success = True
+        self.file = open(output_file, 'w', encoding='utf-8')
+        self.file.write(REPORT_HEADER)
+        self.file.flush()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="report")
+
+    def start_run(self, run_id=None, plan=None):
+        """Slot for TestEngine.run_started: artifacts of each run in a report
+        get their own prefix, so case and step numbers of later runs do not
+        collide with earlier ones."""
+        self.run_count += 1
+
+    def step_id(self, case_index, step_index):
+        prefix = f"run{self.run_count}_" if self.run_count else ""
+        return f"{prefix}case{case_index}_step{step_index}"
+
+    def log_ref(self, case_index, step_index):
+        """Path of a step's log artifact relative to the report directory."""
+        return f"{os.path.basename(self.log_dir)}/{self.step_id(case_index, step_index)}"
+
+    def write_test_case(self, test_case, steps, case_index=None):
+        self.case_count += 1
+        if case_index is None:
+            case_index = self.case_count
         all_steps_success = all(step['success'] for step in steps.values())
         if not all_steps_success:
-            all_tests_success = False  # If any test fails, mark overall failure
+            self.all_tests_success = False
+        # Artifact ids depend on the current run, so take them now
+        step_ids = [self.step_id(case_index, step_index)
+                    for step_index in range(1, len(steps) + 1)]
+        self._executor.submit(self._write_case, test_case, dict(steps),
+                              step_ids, all_steps_success)
 
-    # Final pass or fail status for the entire test suite
-    final_status = "PASS" if all_tests_success else "FAIL"
-    status_class = "success" if all_tests_success else "failure"
-    html_content += f'<h1 class="{status_class}">Test Case Results - {final_status}</h1>'
+    def step_log(self, result):
+        """Encoded blocks of a step's log followed by its trace range."""
+        yield result['log'].encode('utf-8')
+        if self.trace and result.get('trace'):
+            yield from self.trace.read_chunks(*result['trace'])
 
-    # Iterate through test results to generate individual test case sections
-    for test_case, steps in test_results.items():
-        all_steps_success = all(step['success'] for step in steps.values())
-        status_class = "success" if all_steps_success else "failure"
-        html_content += f'''
+    def _write_case(self, test_case, steps, step_ids, all_steps_success):
+        try:
+            status_class = "success" if all_steps_success else "failure"
+            self.file.write(f'''
         <div class="test-case">
             <h2 onclick="toggleTestCase(this)" class="{status_class}">
-                {test_case} - {"Success" if all_steps_success else "Failure"}
+                {escape_html(test_case)} - {"Success" if all_steps_success else "Failure"}
             </h2>
             <div class="steps">
-        '''
-        for step, result in steps.items():
-            status = "success" if result['success'] else "failure"
-            # Escape special characters in logs
-            log_content = result['log'].replace('&', '&amp;').replace('<', '&lt;').replace(
-                '>', '&gt;').replace('"', '&quot;').replace("'", '&#39;')
-            html_content += f'''
+        ''')
+            for step_id, (step, result) in zip(step_ids, steps.items()):
+                status = "success" if result['success'] else "failure"
+                size, lines = write_log_artifact(
+                    step_id, self.step_log(result), os.path.join(self.log_dir, step_id))
+                log_src = f"{os.path.basename(self.log_dir)}/{step_id}"
+                self.file.write(f'''
             <div class="step">
                 <h3>{step}</h3>
-                <div class="log">{log_content}</div>
+                <p class="log-summary" onclick="toggleLog('{step_id}')">Log: {size} bytes, {lines} lines (click to show)</p>
+                <div class="log" id="log-{step_id}" data-src="{log_src}" style="display: none"></div>
+                <button class="log-more" id="more-{step_id}" onclick="loadMoreLog('{step_id}')">Load more</button>
                 <p class="{status}">Result: {"Success" if result['success'] else "Failure"}</p>
             </div>
-            '''
-        html_content += '</div></div>'
+            ''')
+            self.file.write('</div></div>')
+            self.file.flush()
+        except (IOError, ValueError) as e:
+            logging.error(f"Error writing report for {test_case}: {e}")
 
-    # Close the HTML body
-    html_content += """
-    </body>
-    </html>
-    """
-    # Write HTML content to the file
-    with open(output_file, 'w', encoding='utf-8') as file:
-        file.write(html_content)
+    def write_test_case_at(self, case_index, test_case, steps):
+        """Slot for TestEngine.case_finished."""
+        self.write_test_case(test_case, steps, case_index)
+
+    def close(self):
+        """Wait for queued test cases and finish the page. Blocks; call it
+        from an executor when on the event loop."""
+        if self.file.closed:
+            return
+        self._executor.shutdown(wait=True)
+        # Final pass or fail status for the entire test suite
+        final_status = "PASS" if self.all_tests_success else "FAIL"
+        status_class = "success" if self.all_tests_success else "failure"
+        self.file.write(
+            f'<script>setFinalStatus("{final_status}", "{status_class}");</script>')
+        self.file.write(REPORT_FOOTER)
+        self.file.close()
+
+
+def test_results_to_html(test_results, output_file):
+    """Convert test results to HTML and save to a file."""
+    writer = HtmlReportWriter(output_file)
+    try:
+        for test_case, steps in test_results.items():
+            writer.write_test_case(test_case, steps)
+    finally:
+        writer.close()
+
+
+def open_test_results_html(trace=None):
+    """Start a streaming HTML report for a new run."""
+    os.makedirs("test_results", exist_ok=True)
+    file_path = os.path.join(
+        "test_results", f"test_results_{int(time.time())}.html")
+    logging.info(f"Writing test results to {file_path}")
+    return HtmlReportWriter(file_path, trace)
 
 
 def generate_test_results_html(test_results):
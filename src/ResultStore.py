@@ -0,0 +1,119 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+
+RESULTS_DB = os.path.join("test_results", "results.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    plan TEXT,
+    started REAL,
+    finished REAL,
+    success INTEGER
+);
+CREATE TABLE IF NOT EXISTS step_results (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    test_case TEXT,
+    case_index INTEGER,
+    step_index INTEGER,
+    module TEXT,
+    block TEXT,
+    inputs TEXT,
+    success INTEGER,
+    started REAL,
+    finished REAL,
+    duration REAL,
+    log_ref TEXT
+);
+CREATE INDEX IF NOT EXISTS step_results_run ON step_results (run_id);
+CREATE INDEX IF NOT EXISTS step_results_case ON step_results (test_case, step_index);
+CREATE INDEX IF NOT EXISTS step_results_block ON step_results (module, block);
+"""
+
+
+class ResultStore:
+    """SQLite log of every step result, written as soon as the step ends so
+    a crashed run still leaves its results behind."""
+
+    def __init__(self, path=RESULTS_DB):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.report = None
+
+    def attach(self, engine, report=None):
+        """Record everything the engine runs; log_ref points into the report.
+
+        The report is connected to run_started as well, so both number the
+        log artifacts of a run the same way.
+        """
+        self.report = report
+        if report:
+            engine.run_started.connect(report.start_run)
+        engine.run_started.connect(self.start_run)
+        engine.step_result.connect(self.add_step)
+        engine.run_finished.connect(self.finish_run)
+
+    def detach(self, engine):
+        if self.report:
+            engine.run_started.disconnect(self.report.start_run)
+        engine.run_started.disconnect(self.start_run)
+        engine.step_result.disconnect(self.add_step)
+        engine.run_finished.disconnect(self.finish_run)
+        self.report = None
+
+    def start_run(self, run_id, plan):
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO runs (run_id, plan, started) VALUES (?, ?, ?)",
+                    (run_id, plan.name, time.time()))
+        except sqlite3.Error as e:
+            logging.error(f"Error storing run {run_id}: {e}")
+
+    def add_step(self, run_id, case_index, step_index, test_case, step, result):
+        log_ref = self.report.log_ref(case_index, step_index) if self.report else None
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT INTO step_results (run_id, test_case, case_index, step_index, module, block,"
+                    " inputs, success, started, finished, duration, log_ref)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (run_id, test_case, case_index, step_index, step.module, step.block,
+                     json.dumps(step.inputs), int(result['success']), result.get('started'),
+                     result.get('finished'), result.get('duration'), log_ref))
+        except sqlite3.Error as e:
+            logging.error(f"Error storing step result: {e}")
+
+    def finish_run(self, run_id, success):
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE runs SET finished = ?, success = ? WHERE run_id = ?",
+                    (time.time(), int(success), run_id))
+        except sqlite3.Error as e:
+            logging.error(f"Error storing the result of run {run_id}: {e}")
+
+    def pass_rates(self, group_by="block"):
+        """[(module, block, runs, pass_rate)] or [(test_case, runs, pass_rate)]."""
+        columns = "module, block" if group_by == "block" else "test_case"
+        return self.connection.execute(
+            f"SELECT {columns}, COUNT(*), AVG(success) FROM step_results GROUP BY {columns}"
+        ).fetchall()
+
+    def flaky_steps(self, min_runs=2):
+        """Steps of a test case that both passed and failed across runs."""
+        return self.connection.execute(
+            "SELECT test_case, step_index, module, block, COUNT(*), AVG(success)"
+            " FROM step_results GROUP BY test_case, step_index, module, block"
+            " HAVING COUNT(*) >= ? AND MIN(success) = 0 AND MAX(success) = 1",
+            (min_runs,)).fetchall()
+
+    def close(self):
+        self.connection.close()
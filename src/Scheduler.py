@@ -0,0 +1,65 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from tools.HardwareConfig import load_hardware_config
+from tools.Profiler import profile_lane, profiler
+
+
+class ResourceLocks:
+    """One asyncio lock per physical resource named in the hardware config.
+
+    A resource key is the hardware section plus its settings, e.g.
+    "power_supply:1:COM3", so two sections pointing at the same port/channel
+    share a lock while different benches do not.
+    """
+
+    def __init__(self, hardware=None):
+        self.hardware = load_hardware_config() if hardware is None else hardware
+        self._locks = {}
+
+    def resource_key(self, section):
+        settings = self.hardware.get(section, {})
+        values = [str(settings[key]) for key in sorted(settings)]
+        return ":".join([section] + values)
+
+    def resource_keys(self, sections):
+        return sorted({self.resource_key(section) for section in sections})
+
+    def lock(self, key):
+        if key not in self._locks:
+            self._locks[key] = asyncio.Lock()
+        return self._locks[key]
+
+    @asynccontextmanager
+    async def acquire(self, keys):
+        # Keys are sorted so containers always lock in the same order
+        acquired = []
+        try:
+            for key in sorted(keys):
+                await self.lock(key).acquire()
+                acquired.append(key)
+            yield
+        finally:
+            for key in reversed(acquired):
+                self.lock(key).release()
+
+
+async def run_concurrently(jobs, locks):
+    """Run (resource_keys, coroutine_function) jobs concurrently.
+
+    Jobs that share a resource key are serialized in submission order;
+    results are returned in the same order as the jobs.
+    """
+    async def guarded(lane, keys, job):
+        # Each job is its own task, so the lane only applies to this job
+        profile_lane.set(lane)
+        start = time.monotonic_ns()
+        async with locks.acquire(keys):
+            if keys:
+                profiler.record("Waiting for resources", "queue", start,
+                                time.monotonic_ns(), {"resources": keys})
+            return await job()
+
+    return await asyncio.gather(*(guarded(lane, keys, job)
+                                  for lane, (keys, job) in enumerate(jobs, 1)))
@@ -69,7 +69,7 @@ class Step(QWidget):
             self.placeholder.deleteLater()
             self.placeholder = None
         self.block = CodeBlock(
-            block_name, get_all_blocks()[module_name][block_name], module_name)
+            block_name, block_registry.get(module_name, block_name), module_name)
         self.layout.addWidget(self.block)
 
     def mousePressEvent(self, event):
@@ -84,7 +84,7 @@ class Step(QWidget):
 
         drag = QDrag(self)
         mime_data = QMimeData()
-        mime_data.setText(f"{self.block.module_name}:{self.block.block_name}")
+        mime_data.setText(f"{self.block.module_name}:{self.block.block_key}")
         drag.setMimeData(mime_data)
 
         drag.exec_(Qt.MoveAction)
@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import time
+
+TESTCASE_DIR = "testcases"
+CATALOG_FILE = ".catalog.json"
+
+
+def display_name(file_path):
+    return os.path.splitext(os.path.basename(file_path))[0].capitalize().replace("_", " ")
+
+
+def summarize(file_path):
+    """Step count and modules of an exported test case."""
+    with open(file_path, "r") as f:
+        data = json.load(f)
+    steps = [step for container in data.get("containers", [])
+             for step in container.get("steps", [])]
+    return {
+        "steps": len(steps),
+        "modules": sorted({step.get("module") for step in steps if step.get("module")}),
+    }
+
+
+def describe(entry):
+    """One-line summary of a catalog entry, used as its tooltip."""
+    text = f"{entry['path']}: {entry['steps']} steps ({', '.join(entry['modules']) or 'no blocks'})"
+    if entry.get("last_run"):
+        last_run = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["last_run"]))
+        text += f", last run {last_run}: {entry['last_result']}"
+    return text
+
+
+class TestCaseCatalog:
+    """Index of the exported test cases, persisted in testcases/.catalog.json.
+
+    Entries are keyed by path and carry the display name, step count,
+    modules used and the last run. refresh() only stats the directory and
+    re-reads files whose size or mtime changed, so a large library loads
+    from the index instead of parsing every file.
+    """
+
+    def __init__(self, directory=TESTCASE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, CATALOG_FILE)
+        self.entries = {}
+        self._load()
+        self.refresh()
+
+    def _load(self):
+        try:
+            with open(self.index_path, "r") as f:
+                self.entries = {entry["path"]: entry for entry in json.load(f)}
+        except FileNotFoundError:
+            pass
+        except (IOError, ValueError, KeyError) as e:
+            logging.warning(f"Rebuilding test case catalog: {e}")
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{self.index_path}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump(list(self.entries.values()), f, indent=1)
+            os.replace(temp_path, self.index_path)
+        except IOError as e:
+            logging.error(f"Error saving test case catalog: {e}")
+
+    def refresh(self):
+        """Sync with the directory; returns True when anything changed."""
+        os.makedirs(self.directory, exist_ok=True)
+        seen = set()
+        changed = False
+        with os.scandir(self.directory) as files:
+            for file in files:
+                if file.name.endswith(".json") and not file.name.startswith(".") and file.is_file():
+                    path = os.path.join(self.directory, file.name)
+                    seen.add(path)
+                    changed |= self._update(path, file.stat())
+        for path in set(self.entries) - seen:
+            del self.entries[path]
+            changed = True
+        if changed:
+            self.save()
+        return changed
+
+    def update_path(self, path):
+        """Re-index a single file after it was written or removed."""
+        path = os.path.join(self.directory, os.path.basename(path))
+        try:
+            changed = self._update(path, os.stat(path))
+        except FileNotFoundError:
+            changed = self.entries.pop(path, None) is not None
+        if changed:
+            self.save()
+        return changed
+
+    def _update(self, path, stat):
+        entry = self.entries.get(path)
+        if entry and (entry["size"], entry["mtime_ns"]) == (stat.st_size, stat.st_mtime_ns):
+            return False
+        try:
+            summary = summarize(path)
+        except (IOError, ValueError, AttributeError) as e:
+            logging.warning(f"Cannot index test case {path}: {e}")
+            summary = {"steps": 0, "modules": []}
+        self.entries[path] = {
+            "name": display_name(path),
+            "path": path,
+            **summary,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "last_run": entry.get("last_run") if entry else None,
+            "last_result": entry.get("last_result") if entry else None,
+        }
+        return True
+
+    def record_result(self, path, success):
+        if os.path.abspath(os.path.dirname(path)) != os.path.abspath(self.directory):
+            return
+        entry = self.entries.get(os.path.join(self.directory, os.path.basename(path)))
+        if entry is None:
+            return
+        entry["last_run"] = time.time()
+        entry["last_result"] = "PASS" if success else "FAIL"
+        self.save()
+
+    def sorted_entries(self):
+        return sorted(self.entries.values(), key=lambda entry: entry["name"].lower())
@@ -0,0 +1,43 @@
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class TestStep:
+    module: str
+    block: str
+    inputs: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {"module": self.module, "block": self.block, "inputs": list(self.inputs)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("module"), data.get("block"), list(data.get("inputs", [])))
+
+
+@dataclass(slots=True)
+class TestCase:
+    name: str = "Unnamed Test Case"
+    steps: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {"name": self.name, "steps": [step.to_dict() for step in self.steps]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get("name", "Unnamed Test Case"),
+                   [TestStep.from_dict(step) for step in data.get("steps", [])])
+
+
+@dataclass(slots=True)
+class TestPlan:
+    """Plain-data form of an exported test case file."""
+    cases: list = field(default_factory=list)
+    name: str = ""
+
+    def to_dict(self):
+        return {"containers": [case.to_dict() for case in self.cases]}
+
+    @classmethod
+    def from_dict(cls, data, name=""):
+        return cls([TestCase.from_dict(case) for case in data.get("containers", [])], name)
@@ -0,0 +1,50 @@
+import importlib.util
+import logging
+import os
+
+UI_FILE = os.path.join('UI', 'main.ui')
+UI_CACHE_DIR = os.path.join('UI', '__uicache__')
+
+_ui_classes = {}
+
+
+def compiled_ui_path(ui_file):
+    name = os.path.splitext(os.path.basename(ui_file))[0]
+    return os.path.join(UI_CACHE_DIR, f"{name}_ui.py")
+
+
+def compile_ui(ui_file=UI_FILE):
+    """Compile a .ui file to Python once; recompile only when it changes."""
+    output_file = compiled_ui_path(ui_file)
+    if os.path.exists(output_file) and os.path.getmtime(output_file) >= os.path.getmtime(ui_file):
+        return output_file
+    from PyQt5 import uic
+    os.makedirs(UI_CACHE_DIR, exist_ok=True)
+    with open(ui_file, 'r', encoding='utf-8') as source, \
+            open(output_file, 'w', encoding='utf-8') as target:
+        uic.compileUi(source, target)
+    logging.info(f"Compiled {ui_file} to {output_file}")
+    return output_file
+
+
+def load_ui_class(ui_file=UI_FILE):
+    """The generated Ui_* class of a .ui file, imported once per process."""
+    if ui_file not in _ui_classes:
+        output_file = compile_ui(ui_file)
+        spec = importlib.util.spec_from_file_location(
+            os.path.splitext(os.path.basename(output_file))[0], output_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _ui_classes[ui_file] = next(value for name, value in vars(module).items()
+                                    if name.startswith('Ui_'))
+    return _ui_classes[ui_file]
+
+
+def setup_ui(window, ui_file=UI_FILE):
+    """Like uic.loadUi: build the widgets on window and expose them as
+    attributes named after their objectName."""
+    ui = load_ui_class(ui_file)()
+    ui.setupUi(window)
+    for name, value in vars(ui).items():
+        setattr(window, name, value)
+    return ui
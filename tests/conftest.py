@@ -0,0 +1,26 @@
+import asyncio
+
+import pytest
+
+from fake_toellner import FakeToellner
+
+
+@pytest.fixture
+def run_with_supply():
+    """Runs `await test(fake, driver)` with a ToellnerDriver connected to a
+    FakeToellner and returns its result; extra arguments go to the driver."""
+    pytest.importorskip("serial_asyncio")
+    from tools.ToellnerDriver import ToellnerDriver
+
+    def run(test, **driver_options):
+        async def main():
+            fake = FakeToellner()
+            fake.start()
+            driver = ToellnerDriver(fake.port, **driver_options)
+            try:
+                return await test(fake, driver)
+            finally:
+                await driver.close()
+                fake.close()
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import tty
+
+
+class FakeToellner:
+    """Toellner supply stand-in on a pseudo terminal.
+
+    Pass `port` to ToellnerDriver. Understands the SCPI subset the driver
+    uses; set-points are recorded in `history` as (channel, voltage).
+    Set `drop_replies` to swallow that many MEAS:VOLT? answers.
+    """
+
+    def __init__(self, channels=2):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.channel = 1
+        self.voltages = {channel: 0.0 for channel in range(1, channels + 1)}
+        self.outputs = {channel: False for channel in range(1, channels + 1)}
+        self.history = []
+        self.commands = []
+        self.drop_replies = 0
+        self._buffer = b""
+
+    def start(self):
+        asyncio.get_running_loop().add_reader(self.master, self._on_readable)
+
+    def close(self):
+        asyncio.get_running_loop().remove_reader(self.master)
+        os.close(self.master)
+        os.close(self.slave)
+
+    def _on_readable(self):
+        self._buffer += os.read(self.master, 4096)
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            self.handle(line.decode().strip())
+
+    def handle(self, line):
+        self.commands.append(line)
+        command, _, argument = line.partition(" ")
+        if command == "INST":
+            self.channel = int(argument.removeprefix("OUT"))
+        elif command == "VOLT":
+            self.voltages[self.channel] = float(argument)
+            self.history.append((self.channel, float(argument)))
+        elif command == "OUTP":
+            self.outputs[self.channel] = argument == "ON"
+        elif command == "MEAS:VOLT?":
+            if self.drop_replies:
+                self.drop_replies -= 1
+                return
+            os.write(self.master, f"{self.voltages[self.channel]:.3f}\n".encode())
@@ -0,0 +1,68 @@
+import asyncio
+import shutil
+
+import pytest
+
+from tools.AdbShellPool import ShellPool
+
+pytestmark = pytest.mark.skipif(shutil.which("sh") is None, reason="needs a POSIX shell")
+
+# Stands in for `adb [-s serial] shell`: a plain sh reading commands from stdin
+FAKE_ADB = """#!/bin/sh
+while [ "$1" = "-s" ]; do shift 2; done
+[ "$1" = "shell" ] || exit 1
+echo "$$" >> "$0.starts"
+exec sh
+"""
+
+
+@pytest.fixture
+def adb(tmp_path):
+    path = tmp_path / "adb"
+    path.write_text(FAKE_ADB)
+    path.chmod(0o755)
+    return str(path)
+
+
+def starts(adb):
+    with open(f"{adb}.starts") as f:
+        return len(f.read().split())
+
+
+def test_framing_and_exit_codes(adb):
+    async def main():
+        pool = ShellPool(adb)
+        try:
+            assert (await pool.run("echo hi")).stdout == "hi\n"
+            assert (await pool.run("printf 'no newline'")).stdout == "no newline"
+            assert (await pool.run("printf 'a\\n\\nb\\n'")).stdout == "a\n\nb\n"
+            result = await pool.run("echo oops >&2; exit 3")
+            assert (result.returncode, result.stdout) == (3, "oops\n")
+            assert (await pool.run("false")).returncode == 1
+            # Commands reading stdin see EOF instead of the sentinel line
+            result = await asyncio.wait_for(pool.run("cat; read line; echo done"), 5)
+            assert (result.returncode, result.stdout) == (0, "done\n")
+            assert (await pool.run("echo still framed")).stdout == "still framed\n"
+        finally:
+            await pool.reset()
+        assert starts(adb) == 1
+    asyncio.run(main())
+
+
+def test_reconnects_after_the_session_dies(adb):
+    async def main():
+        pool = ShellPool(adb)
+        session = pool.session("SERIAL1")
+        try:
+            assert (await session.run("echo one")).stdout == "one\n"
+            result = await session.run("kill -9 $$", retries=0)
+            assert result.returncode == -1 and "closed" in result.stderr
+            assert (await session.run("echo two")).stdout == "two\n"
+            assert starts(adb) == 2
+            # The session dies under this command once; it is retried on a new one
+            once = f"[ $(wc -l < {adb}.starts) -gt 2 ] || kill -9 $$; echo three"
+            assert (await session.run(once)).stdout == "three\n"
+            assert starts(adb) == 3
+        finally:
+            await pool.reset()
+    asyncio.run(main())
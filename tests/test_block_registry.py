@@ -0,0 +1,31 @@
+import asyncio
+import threading
+
+from src.BlockRegistry import wrap_block
+
+
+def test_timed_out_block_keeps_its_slot():
+    release = threading.Event()
+    running = []
+
+    def slow():
+        running.append(threading.get_ident())
+        release.wait(5)
+        return True
+
+    block = wrap_block({"function": slow, "max_concurrency": 1})
+
+    async def main():
+        try:
+            await asyncio.wait_for(block(), 0.1)
+        except asyncio.TimeoutError:
+            pass
+        # The first worker is still running, so a second call must queue
+        second = asyncio.create_task(block())
+        await asyncio.sleep(0.1)
+        assert len(running) == 1 and not second.done()
+        release.set()
+        assert await asyncio.wait_for(second, 5)
+        assert len(running) == 2
+
+    asyncio.run(main())
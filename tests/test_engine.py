@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+from src.Engine import TestEngine as Engine
+from src.TestPlan import TestCase as Case, TestPlan as Plan, TestStep as Step
+
+
+async def chatter(name, count):
+    for number in range(int(count)):
+        logging.info(f"{name} line {number}")
+        await asyncio.sleep(0)
+    return True
+
+
+def quiet(name):
+    logging.info(f"{name} from a thread")
+    return True
+
+
+async def query_timeout():
+    raise asyncio.TimeoutError()
+
+
+async def hang():
+    await asyncio.sleep(10)
+
+
+class FakeRegistry:
+    BLOCKS = {"Chatter": chatter, "Quiet": quiet, "Query Timeout": query_timeout, "Hang": hang}
+    OPTIONS = {"Hang": {"timeout": 0.1}}
+
+    def get(self, module_name, block_name):
+        return self.BLOCKS.get(block_name)
+
+    def options(self, module_name, block_name):
+        return self.OPTIONS.get(block_name, {})
+
+    def resources(self, module_name):
+        return []
+
+
+def test_concurrent_steps_keep_their_own_logs(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    caplog.set_level(logging.INFO)
+    engine = Engine(registry=FakeRegistry())
+    plan = Plan([
+        Case("a", [Step("Fake", "Chatter", ["a", 50]), Step("Fake", "Quiet", ["a"])]),
+        Case("b", [Step("Fake", "Chatter", ["b", 50])]),
+    ], "logs")
+    results = asyncio.run(engine.run(plan))
+
+    first = results["Test Case 1: a"]["Step 1"]["log"]
+    assert first.count("a line") == 50 and "b line" not in first
+    assert " - INFO - a from a thread\n" in results["Test Case 1: a"]["Step 2"]["log"]
+    second = results["Test Case 2: b"]["Step 1"]["log"]
+    assert second.count("b line") == 50 and "a line" not in second
+    assert "Executing step 1: Chatter" in second
+
+
+def test_block_timeout_is_not_reported_as_step_deadline(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    caplog.set_level(logging.INFO)
+    engine = Engine(registry=FakeRegistry())
+    plan = Plan([Case("a", [Step("Fake", "Query Timeout")]), Case("b", [Step("Fake", "Hang")])], "timeouts")
+    results = asyncio.run(engine.run(plan))
+
+    raised = results["Test Case 1: a"]["Step 1"]
+    assert not raised["success"]
+    assert "Exception occurred during step 1: TimeoutError()" in raised["log"]
+    assert "timed out" not in raised["log"]
+    hung = results["Test Case 2: b"]["Step 1"]
+    assert not hung["success"]
+    assert "Step 1 (Hang) timed out after 0.1s" in hung["log"]
@@ -0,0 +1,44 @@
+import os
+
+from src.LogStore import LogStore
+
+
+def fill(store, count, run_id="run1"):
+    for number in range(count):
+        step = f"Step {number % 2 + 1}"
+        store.append(1700000000.25 + number, "INFO", f"record {number}", run_id, "Test Case 1", step)
+
+
+def test_ring_drops_without_spill():
+    store = LogStore(capacity=4)
+    fill(store, 10)
+    assert len(store) == 4 and store.first_seq == 6
+    assert [record.message for record in store.query("run1")] == [
+        "record 6", "record 7", "record 8", "record 9"]
+
+
+def test_spilled_records_page_in_order(tmp_path):
+    store = LogStore(capacity=4, spill_path=str(tmp_path / "spill.jsonl"))
+    fill(store, 10)
+    step = store.query("run1", "Test Case 1", "Step 1")
+    assert [record.message for record in step] == [f"record {n}" for n in range(0, 10, 2)]
+    page = store.query("run1", offset=3, limit=4)
+    assert [record.seq for record in page] == [3, 4, 5, 6]
+    text = store.text("run1", "Test Case 1", "Step 2")
+    assert text.count("\n") == 5 and text.endswith(" - INFO - record 9\n")
+    store.close()
+    assert not os.path.exists(tmp_path / "spill.jsonl")
+
+
+def test_discard_empties_the_spill_file(tmp_path):
+    path = tmp_path / "spill.jsonl"
+    store = LogStore(capacity=4, spill_path=str(path))
+    fill(store, 10)
+    assert path.stat().st_size > 0
+    store.discard("run1")
+    assert path.stat().st_size == 0
+    # Records of a discarded run still in the ring are not spilled later
+    fill(store, 4, run_id=None)
+    assert path.stat().st_size == 0
+    assert [record.message for record in store.query("run1")] == []
+    store.close()
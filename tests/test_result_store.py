@@ -0,0 +1,22 @@
+import sqlite3
+
+from src.ResultStore import ResultStore
+from src.TestPlan import TestPlan as Plan
+
+
+def test_locked_database_does_not_break_the_run(tmp_path):
+    path = str(tmp_path / "results.sqlite3")
+    store = ResultStore(path)
+    store.connection.execute("PRAGMA busy_timeout = 0")
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        store.start_run("run1", Plan(name="locked"))
+        store.finish_run("run1", True)
+    finally:
+        other.rollback()
+        other.close()
+    store.start_run("run2", Plan(name="free"))
+    store.finish_run("run2", False)
+    assert store.connection.execute("SELECT run_id, success FROM runs").fetchall() == [("run2", 0)]
+    store.close()
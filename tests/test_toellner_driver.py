@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("serial_asyncio")
+
+
+def test_set_and_readback(run_with_supply):
+    async def test(fake, driver):
+        assert await driver.set_voltage(12.5) == pytest.approx(12.5)
+        await driver.set_output(True)
+        assert await driver.wait_for_voltage(12.5)
+        assert fake.outputs[1]
+    run_with_supply(test)
+
+
+def test_ramp_is_sent_in_order(run_with_supply):
+    async def test(fake, driver):
+        ramp = [12.0 - index * 0.5 for index in range(13)]
+        await driver.apply_profile(ramp)
+        assert await driver.measure_voltage() == pytest.approx(6.0)
+        assert [voltage for channel, voltage in fake.history] == pytest.approx(ramp)
+    run_with_supply(test, channel=2)
+
+
+def test_lost_reply_does_not_shift_later_replies(run_with_supply):
+    async def test(fake, driver):
+        await driver.set_voltage(5, readback=False)
+        fake.drop_replies = 1
+        with pytest.raises(asyncio.TimeoutError):
+            await driver.measure_voltage()
+        await driver.set_voltage(7, readback=False)
+        assert await driver.measure_voltage() == pytest.approx(7)
+        assert await driver.set_voltage(8) == pytest.approx(8)
+    run_with_supply(test, timeout=0.3)
+
+
+def test_write_error_fails_callers_and_reconnects(run_with_supply):
+    async def test(fake, driver):
+        await driver.set_voltage(5, readback=False)
+
+        def unplugged(data):
+            raise OSError("device disconnected")
+        driver._writer.write = unplugged
+        with pytest.raises(ConnectionError):
+            await driver.write("VOLT 6.000")
+        assert not driver.is_connected
+        assert await driver.set_voltage(7) == pytest.approx(7)
+    run_with_supply(test)
@@ -0,0 +1,26 @@
+from tools.TraceCapture import MARKER_PREFIX, TraceCapture
+
+
+def test_markers_wait_for_the_end_of_a_trace_line(tmp_path):
+    capture = TraceCapture(directory=str(tmp_path))
+    capture._append(b"boot\nvoltage ")
+    start = capture.mark_step("run", 1, 1, "start")
+    capture._append(b"low 5.1V")
+    end = capture.mark_step("run", 1, 1, "end")
+    capture._append(b"\nready\n")
+
+    lines = capture.read(0).splitlines()
+    assert lines[:2] == ["boot", "voltage low 5.1V"]
+    assert [line.split()[3:7] for line in lines[2:4]] == [
+        ["run", "1", "1", "start"], ["run", "1", "1", "end"]]
+    assert lines[4] == "ready"
+    # The returned offsets still split the stream where the step began and ended
+    assert capture.read(start, end) == "low 5.1V"
+    assert capture.step_offsets == {(1, 1, "start"): start, (1, 1, "end"): end}
+
+
+def test_marker_at_a_line_boundary_is_written_at_once(tmp_path):
+    capture = TraceCapture(directory=str(tmp_path))
+    capture._append(b"boot\n")
+    offset = capture.mark("hello")
+    assert capture.read(offset).startswith(f"{MARKER_PREFIX} hello ")
@@ -0,0 +1,27 @@
+import os
+
+from tools import TraceIndex
+from tools.TraceCapture import TraceCapture
+from tools.TraceIndex import CaptureIndex
+
+
+def test_capture_search_releases_rotated_segments(tmp_path):
+    capture = TraceCapture(directory=str(tmp_path), segment_size=1000, max_segments=3)
+    index = CaptureIndex(capture)
+    for number in range(1000):
+        capture._append(f"12:00:00.000 line {number} value={number % 7}\n".encode())
+        if number % 25 == 0:
+            assert index.contains(rf"line {number} ")
+    offset, line = index.search("line 999 ")[0]
+    assert line.startswith("12:00:00.000 line 999 ")
+    assert capture.read(offset, offset + len(line)) == line
+
+    cached = [key for key in TraceIndex._indexes if key.startswith(str(tmp_path))]
+    # Only the completed segments still on disk are indexed, never the live one
+    assert len(cached) <= capture.max_segments - 1
+    assert os.path.abspath(capture.segment_path(capture.segments[-1][0])) not in cached
+    assert sorted(os.listdir(tmp_path)) == [
+        os.path.basename(capture.segment_path(number)) for number, _ in capture.segments]
+    if os.path.exists("/proc/self/maps"):
+        with open("/proc/self/maps") as f:
+            assert not [row for row in f if str(tmp_path) in row and "(deleted)" in row]
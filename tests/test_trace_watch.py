@@ -0,0 +1,38 @@
+import pytest
+
+from tools.TraceWatch import PatternWatch
+
+
+def test_patterns_on_one_line_all_match():
+    watch = PatternWatch(["boot", "ready"])
+    assert watch.feed(b"boot ok, ready\n")
+    assert watch.matches == {"boot": "boot ok, ready", "ready": "boot ok, ready"}
+
+
+def test_backreference_pattern():
+    watch = PatternWatch([r"(\w+)=\1", "done"], [r"err(or)? (\d+)"])
+    assert not watch.feed(b"a=b\ndone\n")
+    assert watch.feed(b"x=x\n")
+    assert watch.matches[r"(\w+)=\1"] == "x=x"
+    assert watch.violation is None
+
+
+def test_forbidden_grouped_pattern():
+    watch = PatternWatch(["ready"], [r"(fail|error) \d+"])
+    assert watch.feed(b"error 42\nready\n")
+    assert watch.violation == (r"(fail|error) \d+", "error 42")
+
+
+def test_invalid_pattern():
+    with pytest.raises(ValueError, match="Invalid trace pattern 'a\\('"):
+        PatternWatch(["a("])
+
+
+def test_inline_flag_patterns():
+    watch = PatternWatch(["boot", "(?i)ready"], ["(?i)fatal"])
+    assert not watch.feed(b"BOOT\nboot\n")
+    assert watch.feed(b"System READY\n")
+    assert watch.matches["(?i)ready"] == "System READY"
+    watch = PatternWatch(["(?i)boot"], ["(?i)fatal"])
+    assert watch.feed(b"FATAL\n")
+    assert watch.violation == ("(?i)fatal", "FATAL")
@@ -0,0 +1,34 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("serial_asyncio")
+
+from tools.Waveform import ramp, stream_profile
+
+
+def stream(run_with_supply, times, voltages, baudrate=115200):
+    async def test(fake, driver):
+        stats = await stream_profile(driver, times, voltages)
+        # Every set-point is on the line once stream_profile returns
+        await driver.measure_voltage()
+        return stats, fake
+    return run_with_supply(test, baudrate=baudrate)
+
+
+def test_profile_reaches_supply_in_order(run_with_supply):
+    times, voltages = ramp(12.0, 6.0, duration=0.2, step=0.01)
+    stats, fake = stream(run_with_supply, times, voltages)
+    # The final two commands are the readback query
+    assert fake.commands[:-2].count("INST OUT1") == 1
+    assert [voltage for channel, voltage in fake.history] == pytest.approx(voltages, abs=1e-3)
+    assert stats["points"] == len(times)
+    assert stats["achieved_duration"] >= times[-1]
+
+
+def test_line_limited_profile_reports_lateness(run_with_supply):
+    # 12 bytes per point take about 12.5ms at 9600 baud, ten times the spacing
+    times, voltages = ramp(12.0, 6.0, duration=0.05, step=0.001)
+    stats, fake = stream(run_with_supply, times, voltages, baudrate=9600)
+    assert len(fake.history) == len(times)
+    assert stats["max_jitter"] > 0.3
+    assert stats["achieved_duration"] > 0.5
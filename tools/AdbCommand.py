@@ -2,78 +2,145 @@ import subprocess
 import asyncio
 import logging
 
+from .AdbDeviceTracker import DeviceTracker
+from .AdbShellPool import ShellPool
+from .Profiler import profiler
+from .Wait import wait_until
+
+# Seconds to wait for the device state changes that used to be fixed sleeps
+ROOT_TIMEOUT = 20
+DISCONNECT_TIMEOUT = 10
+REBOOT_TIMEOUT = 120
+# Seconds a single adb invocation may take before it is killed
+SUBPROCESS_TIMEOUT = 300
+
 
 class ADBCommand:
-    def __init__(self):
+    def __init__(self, adb_path="adb", serial=None):
+        self.adb_path = adb_path
+        self.serial = serial
         self.swu_timer_reboot_command = ""
         self.toggle_watchdog_command = ""
-        self.device_list = self.check_devices()
-        self.is_connected = bool(self.device_list)
+        self.tracker = DeviceTracker(adb_path)
+        self.shell_pool = ShellPool(adb_path)
+
+    @property
+    def device_list(self):
+        return self.check_devices()
+
+    @property
+    def is_connected(self):
+        if self.serial is not None:
+            return self.tracker.state(self.serial) in ("device", "recovery")
+        return bool(self.device_list)
 
     def check_devices(self):
-        result = subprocess.run(
-            ["adb", "devices"], text=True, capture_output=True)
-        devices = [line for line in result.stdout.splitlines()
-                   if "\tdevice" in line or "\trecovery" in line]
-        return devices
+        return [line for line in self.tracker.device_lines()
+                if "\tdevice" in line or "\trecovery" in line]
 
     def is_recovery_mode(self) -> bool:
-        self.refresh_connection()
-        if self.is_connected:
-            return any("\trecovery" in device for device in self.device_list)
-        return False
+        return self.tracker.state(self.serial) == "recovery"
+
+    async def refresh_connection(self):
+        await self.tracker.start()
 
-    def refresh_connection(self):
-        self.device_list = self.check_devices()
-        self.is_connected = bool(self.device_list)
+    def adb_command(self, *args):
+        if self.serial is not None:
+            return [self.adb_path, "-s", self.serial, *args]
+        return [self.adb_path, *args]
 
     async def set_root_privilege(self) -> bool:
-        self.refresh_connection()
+        await self.refresh_connection()
         if await self.check_root_privilege():
             return True
-        await self.run_subprocess(["adb", "root"])
-        await asyncio.sleep(8)
-        return await self.check_root_privilege()
+        await self.run_subprocess(self.adb_command("root"))
+        await self.shell_pool.reset(self.serial)
+        # adbd restarts as root; poll until it answers instead of a fixed sleep
+        return await wait_until(self.check_root_privilege, timeout=ROOT_TIMEOUT,
+                                interval=0.5, description="adb root") is not False
 
     async def check_root_privilege(self) -> bool:
-        self.refresh_connection()
+        await self.refresh_connection()
         if self.is_recovery_mode():
             return True
         else:
-            result = await self.run_subprocess(["adb", "shell", "id"])
+            result = await self.shell_pool.run("id", self.serial)
             return "uid=0(root)" in result.stdout
 
-    async def run_subprocess(self, command) -> subprocess.CompletedProcess:
+    async def run_subprocess(self, command, timeout=SUBPROCESS_TIMEOUT) -> subprocess.CompletedProcess:
+        process = None
         try:
-            process = await asyncio.create_subprocess_exec(
-                *command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            stdout, stderr = await process.communicate()
+            with profiler.span(" ".join(command), "adb"):
+                process = await asyncio.create_subprocess_exec(
+                    *command,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE
+                )
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
             stdout_decoded = stdout.decode()
             stderr_decoded = stderr.decode()
             return subprocess.CompletedProcess(command, process.returncode, stdout_decoded, stderr_decoded)
+        except asyncio.TimeoutError:
+            logging.error(f"{' '.join(command)} timed out after {timeout}s")
         except Exception as e:
             pass
+        finally:
+            # Timed out or cancelled: do not leave adb running behind the step
+            if process is not None and process.returncode is None:
+                process.kill()
+                await process.wait()
 
     async def run_adb_shell_command(self, user_command):
-        self.refresh_connection()
-        base_command = ["adb", "shell"]
-        full_command = base_command + user_command.split()
-        result = await self.run_subprocess(full_command)
-        return result
-
-    async def reboot_to_mode(self, mode="normal"):
-        self.refresh_connection()
-        if self.is_connected:
-            await self.run_subprocess(["adb", "reboot", mode.lower()])
-            await asyncio.sleep(5)
-            self.refresh_connection()
+        await self.refresh_connection()
+        return await self.shell_pool.run(user_command, self.serial)
+
+    async def reboot_to_mode(self, mode="normal") -> bool:
+        await self.refresh_connection()
+        if not self.is_connected:
+            return False
+        boot_id = await self.boot_id()
+        await self.shell_pool.reset(self.serial)
+        await self.run_subprocess(self.adb_command("reboot", mode.lower()))
+        # The device drops off the bus first, then comes back in the new mode
+        disconnected = await self.tracker.wait_for(
+            lambda devices: not self.is_connected, timeout=DISCONNECT_TIMEOUT)
+        if not disconnected:
+            logging.warning(f"Device did not disconnect within {DISCONNECT_TIMEOUT}s after reboot")
+        target_state = "recovery" if mode.lower() == "recovery" else "device"
+        if not await self.tracker.wait_for_state(target_state, self.serial, timeout=REBOOT_TIMEOUT):
+            logging.warning(f"Device did not come back in {target_state} mode")
+            return False
+        # Without a seen disconnect the device may never have rebooted, and
+        # sys.boot_completed would still be "1" from the previous boot
+        await self.shell_pool.reset(self.serial)
+        new_boot_id = await self.boot_id()
+        if boot_id is not None and new_boot_id == boot_id:
+            logging.error("Device did not reboot: boot_id is unchanged")
+            return False
+        if not disconnected and (boot_id is None or new_boot_id is None):
+            logging.error("Cannot confirm the reboot: no disconnect seen and no boot_id to compare")
+            return False
+        if target_state == "device":
+            return await self.wait_for_boot_completed()
+        return True
+
+    async def boot_id(self):
+        """Kernel boot id, which changes on every boot; None when unreadable."""
+        result = await self.shell_pool.run("cat /proc/sys/kernel/random/boot_id", self.serial)
+        boot_id = result.stdout.strip()
+        return boot_id if result.returncode == 0 and boot_id else None
+
+    async def wait_for_boot_completed(self, timeout=REBOOT_TIMEOUT) -> bool:
+        async def boot_completed():
+            result = await self.shell_pool.run("getprop sys.boot_completed", self.serial)
+            return result.stdout.strip() == "1"
+        return await wait_until(boot_completed, timeout=timeout, interval=0.5,
+                                description="sys.boot_completed") is not False
 
     async def push_file(self, file_path, des_path):
+        await self.refresh_connection()
         if self.is_connected:
-            result = await self.run_subprocess(["adb", "push", file_path, des_path])
+            result = await self.run_subprocess(self.adb_command("push", file_path, des_path))
             success_patterns = ["1 file pushed", "0 skipped"]
             fail_patterns = ["error", "failed to copy"]
             return any(pattern in result.stdout for pattern in success_patterns) and not any(pattern in result.stdout for pattern in fail_patterns)
@@ -89,8 +156,8 @@ class ADBCommand:
             return result
 
     async def remount(self):
-        if self.is_connected and self.check_root_privilege():
-            result = await self.run_subprocess(["adb", "remount"])
+        if self.is_connected and await self.check_root_privilege():
+            result = await self.run_subprocess(self.adb_command("remount"))
             return result
 
 
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+
+
+class DeviceTracker:
+    """Keeps an in-memory table of adb devices from a long-lived
+    `adb track-devices` stream so state reads never spawn a process."""
+
+    def __init__(self, adb_path="adb", retry_delay=1.0, max_retry_delay=10.0):
+        self.adb_path = adb_path
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.devices = {}
+        self._task = None
+        self._process = None
+        self._changed = None
+        self._ready = None
+
+    def _events(self):
+        if self._changed is None:
+            self._changed = asyncio.Condition()
+            self._ready = asyncio.Event()
+        return self._changed
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    async def start(self, wait_ready=True, timeout=5.0):
+        """Start the tracking stream once; later calls return immediately."""
+        self._events()
+        if not self.is_running:
+            self._task = asyncio.create_task(self._track())
+        if wait_ready and not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                logging.warning("adb track-devices did not report in time")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._process is not None:
+            await self._process.wait()
+            self._process = None
+
+    async def _track(self):
+        delay = self.retry_delay
+        while True:
+            try:
+                self._process = await asyncio.create_subprocess_exec(
+                    self.adb_path, "track-devices",
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.DEVNULL)
+                while True:
+                    header = await self._process.stdout.readexactly(4)
+                    payload = await self._process.stdout.readexactly(
+                        int(header, 16))
+                    await self.update(payload.decode(errors="replace"))
+                    delay = self.retry_delay
+            except asyncio.CancelledError:
+                self._kill()
+                raise
+            except (asyncio.IncompleteReadError, ValueError, OSError) as e:
+                logging.warning(f"adb track-devices stream lost: {e}")
+            self._kill()
+            if self._process is not None:
+                await self._process.wait()
+            await self.update("")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def _kill(self):
+        if self._process is not None and self._process.returncode is None:
+            self._process.kill()
+
+    async def update(self, payload):
+        """Replace the device table from a track-devices payload.
+
+        Also used directly as a stand-in for the adb stream during tests.
+        """
+        devices = {}
+        for line in payload.splitlines():
+            serial, _, state = line.partition("\t")
+            if serial and state:
+                devices[serial] = state.strip()
+        changed = self._events()
+        async with changed:
+            if devices != self.devices:
+                logging.debug(f"adb devices changed: {devices}")
+            self.devices = devices
+            self._ready.set()
+            changed.notify_all()
+
+    def state(self, serial=None):
+        if serial is not None:
+            return self.devices.get(serial)
+        return next(iter(self.devices.values()), None)
+
+    def device_lines(self):
+        return [f"{serial}\t{state}" for serial, state in self.devices.items()]
+
+    async def wait_for(self, predicate, timeout=None):
+        """Wait until predicate(devices) holds; returns False on timeout."""
+        changed = self._events()
+
+        async def wait():
+            async with changed:
+                await changed.wait_for(lambda: predicate(self.devices))
+
+        try:
+            await asyncio.wait_for(wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def wait_for_state(self, states, serial=None, timeout=None):
+        if isinstance(states, str):
+            states = (states,)
+        return await self.wait_for(
+            lambda devices: self.state(serial) in states, timeout)
@@ -0,0 +1,106 @@
+import asyncio
+import logging
+import subprocess
+import uuid
+
+from .Profiler import profiler
+
+SENTINEL = "__AUTOMATIONGUI_END__"
+
+
+class ShellSession:
+    """One persistent `adb shell` process. Commands are written to its stdin
+    and their output is framed by a sentinel line carrying the exit code."""
+
+    def __init__(self, adb_path="adb", serial=None):
+        self.adb_path = adb_path
+        self.serial = serial
+        self._process = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_alive(self):
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self):
+        command = [self.adb_path]
+        if self.serial is not None:
+            command += ["-s", self.serial]
+        self._process = await asyncio.create_subprocess_exec(
+            *command, "shell",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT)
+
+    async def close(self):
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            process.kill()
+            await process.wait()
+
+    async def _execute(self, command):
+        marker = f"{SENTINEL}{uuid.uuid4().hex}"
+        # The command must not read the session's stdin, where the sentinel follows
+        self._process.stdin.write(
+            f"( {command}\n) </dev/null 2>&1; printf '\\n{marker} %d\\n' $?\n".encode())
+        await self._process.stdin.drain()
+
+        output = []
+        while True:
+            line = await self._process.stdout.readline()
+            if not line:
+                raise ConnectionError("adb shell session closed")
+            line = line.decode(errors="replace")
+            if line.startswith(marker):
+                returncode = int(line[len(marker):].strip() or -1)
+                break
+            output.append(line)
+        # Drop the newline printed in front of the sentinel
+        stdout = "".join(output)
+        if stdout.endswith("\n"):
+            stdout = stdout[:-1]
+        return returncode, stdout
+
+    async def run(self, command, retries=1):
+        async with self._lock:
+            for attempt in range(retries + 1):
+                if not self.is_alive:
+                    await self.start()
+                try:
+                    with profiler.span(command, "adb shell"):
+                        returncode, stdout = await self._execute(command)
+                    return subprocess.CompletedProcess(command, returncode, stdout, "")
+                except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
+                    await self.close()
+                    if attempt == retries:
+                        logging.error(f"adb shell command '{command}' failed: {e}")
+                        return subprocess.CompletedProcess(command, -1, "", str(e))
+                    logging.info("adb shell session lost, reconnecting...")
+                except asyncio.CancelledError:
+                    # Output of a half-read command would corrupt the framing
+                    await self.close()
+                    raise
+
+
+class ShellPool:
+    """Persistent shell sessions, one per device serial."""
+
+    def __init__(self, adb_path="adb"):
+        self.adb_path = adb_path
+        self._sessions = {}
+
+    def session(self, serial=None):
+        if serial not in self._sessions:
+            self._sessions[serial] = ShellSession(self.adb_path, serial)
+        return self._sessions[serial]
+
+    async def run(self, command, serial=None):
+        return await self.session(serial).run(command)
+
+    async def reset(self, serial=None):
+        """Drop sessions (e.g. before a reboot); they reconnect on next use."""
+        serials = list(self._sessions) if serial is None else [serial]
+        for key in serials:
+            session = self._sessions.pop(key, None)
+            if session is not None:
+                await session.close()
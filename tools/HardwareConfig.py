@@ -0,0 +1,14 @@
+import json
+import logging
+import os
+
+HARDWARE_CONFIG = os.path.join('configs', 'hardware.json')
+
+
+def load_hardware_config(path=HARDWARE_CONFIG):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (IOError, json.JSONDecodeError) as e:
+        logging.warning(f"Could not read hardware config {path}: {e}")
+        return {}
@@ -0,0 +1,137 @@
+import bisect
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+HISTOGRAM_FILE = os.path.join("test_results", "block_histograms.json")
+
+# Upper bounds of the histogram buckets in seconds, the last one catches the rest
+BUCKET_BOUNDS = [0.001, 0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60, 300]
+
+# Timeline row (test case index) the current task records its spans on
+profile_lane = contextvars.ContextVar("profile_lane", default=0)
+
+
+class Histogram:
+    def __init__(self, counts=None, total=0.0, minimum=None, maximum=None):
+        self.counts = counts or [0] * (len(BUCKET_BOUNDS) + 1)
+        self.total = total
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def add(self, seconds):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.total += seconds
+        self.minimum = seconds if self.minimum is None else min(self.minimum, seconds)
+        self.maximum = seconds if self.maximum is None else max(self.maximum, seconds)
+
+    def to_dict(self):
+        return {"counts": self.counts, "total": self.total,
+                "min": self.minimum, "max": self.maximum}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["counts"], data["total"], data["min"], data["max"])
+
+
+class Profiler:
+    """Collects monotonic spans for a run and per-block duration histograms.
+
+    Spans export as a Chrome trace (open in chrome://tracing or Perfetto);
+    histograms are merged into HISTOGRAM_FILE so they accumulate across runs.
+    """
+
+    def __init__(self, histogram_file=HISTOGRAM_FILE):
+        self.histogram_file = histogram_file
+        self.events = []
+        self.histograms = {}
+        self.origin = time.monotonic_ns()
+        self._lock = threading.Lock()
+
+    def start_run(self):
+        with self._lock:
+            self.events = []
+            self.histograms = {}
+            self.origin = time.monotonic_ns()
+
+    def record(self, name, category, start_ns, end_ns, args=None):
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start_ns - self.origin) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": 1,
+            "tid": profile_lane.get(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name, category, **args):
+        start = time.monotonic_ns()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.monotonic_ns(), args)
+
+    def add_block_duration(self, block_type, seconds):
+        with self._lock:
+            self.histograms.setdefault(block_type, Histogram()).add(seconds)
+
+    def export_chrome_trace(self, file_path):
+        with self._lock:
+            events = list(self.events)
+        lanes = sorted({event["tid"] for event in events})
+        metadata = [{"name": "thread_name", "ph": "M", "pid": 1, "tid": lane,
+                     "args": {"name": f"Test Case {lane}" if lane else "Run"}}
+                    for lane in lanes]
+        with open(file_path, "w") as f:
+            json.dump({"traceEvents": metadata + events,
+                       "displayTimeUnit": "ms"}, f)
+        return file_path
+
+    def save_histograms(self):
+        """Merge this run's histograms into the histogram file."""
+        stored = {}
+        try:
+            with open(self.histogram_file, "r") as f:
+                stored = {name: Histogram.from_dict(data)
+                          for name, data in json.load(f).items()}
+        except (IOError, ValueError, KeyError):
+            pass
+        with self._lock:
+            for name, histogram in self.histograms.items():
+                merged = stored.setdefault(name, Histogram())
+                merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+                merged.total += histogram.total
+                merged.minimum = histogram.minimum if merged.minimum is None else min(merged.minimum, histogram.minimum)
+                merged.maximum = histogram.maximum if merged.maximum is None else max(merged.maximum, histogram.maximum)
+        os.makedirs(os.path.dirname(self.histogram_file) or ".", exist_ok=True)
+        with open(self.histogram_file, "w") as f:
+            json.dump({name: histogram.to_dict()
+                       for name, histogram in stored.items()}, f, indent=2)
+        return stored
+
+    def log_summary(self, limit=10):
+        """Log the blocks that took the most time in this run."""
+        with self._lock:
+            slowest = sorted(self.histograms.items(),
+                             key=lambda item: item[1].total, reverse=True)[:limit]
+        for name, histogram in slowest:
+            logging.info(
+                f"Profile: {name}: {histogram.count} calls, {histogram.total:.2f}s total, "
+                f"{histogram.total / histogram.count:.2f}s avg, {histogram.maximum:.2f}s max")
+
+
+profiler = Profiler()
@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+from .HardwareConfig import load_hardware_config
+
+# Relay board channel of each wire, overridable with "channels" in hardware.json
+DEFAULT_CHANNELS = {"ACC": 0, "BAT": 1, "GND": 2}
+
+
+class RelayBackend:
+    """Switches relays. apply() changes several relays in one transaction."""
+
+    def __init__(self, channels=None):
+        self.channels = dict(channels or DEFAULT_CHANNELS)
+        self.states = {name: False for name in self.channels}
+        self._lock = asyncio.Lock()
+
+    def parse_state(self, text):
+        """'ACC=1, BAT=0' -> {'ACC': True, 'BAT': False}"""
+        states = {}
+        for item in filter(None, (part.strip() for part in text.split(","))):
+            name, _, value = item.partition("=")
+            states[name.strip().upper()] = value.strip().lower() in ("1", "on", "true", "closed")
+        return states
+
+    async def apply(self, states):
+        unknown = set(states) - set(self.channels)
+        if unknown:
+            raise KeyError(f"Unknown relay(s): {', '.join(sorted(unknown))}")
+        async with self._lock:
+            new_states = {**self.states, **states}
+            await self._write(new_states)
+            self.states = new_states
+
+    async def _write(self, states):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class LoopbackRelayBackend(RelayBackend):
+    """Keeps relay states in memory only; used when no relay port is set and in tests."""
+
+    def __init__(self, channels=None):
+        super().__init__(channels)
+        self.transactions = []
+
+    async def _write(self, states):
+        self.transactions.append(dict(states))
+        logging.info(f"Relay state (loopback): {states}")
+
+
+class SerialRelayBackend(RelayBackend):
+    """Relay board on a serial port taking the whole state as one bit mask
+    line ("STATE <hex>"), so a transaction is a single write."""
+
+    def __init__(self, port, channels=None, baudrate=9600):
+        super().__init__(channels)
+        self.port = port
+        self.baudrate = baudrate
+        self._writer = None
+
+    async def _write(self, states):
+        if self._writer is None:
+            import serial_asyncio
+            _, self._writer = await serial_asyncio.open_serial_connection(
+                url=self.port, baudrate=self.baudrate)
+        mask = sum(1 << self.channels[name] for name, closed in states.items() if closed)
+        self._writer.write(f"STATE {mask:X}\n".encode())
+        await self._writer.drain()
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+_backend = None
+
+
+def get_relay_backend():
+    """Shared backend for the relay board configured in configs/hardware.json."""
+    global _backend
+    if _backend is None:
+        settings = load_hardware_config().get("relay", {})
+        if settings.get("port"):
+            _backend = SerialRelayBackend(settings["port"], settings.get("channels"))
+        else:
+            _backend = LoopbackRelayBackend(settings.get("channels"))
+    return _backend
@@ -0,0 +1,183 @@
+import asyncio
+import collections
+import logging
+
+from .HardwareConfig import load_hardware_config
+from .Wait import wait_until
+
+# Volts between the requested and read back output voltage to count as settled
+VOLTAGE_TOLERANCE = 0.1
+SETTLE_TIMEOUT = 2.0
+
+
+class ToellnerDriver:
+    """Async SCPI driver for a Toellner power supply on a serial port.
+
+    One connection is kept open. Commands go through a write queue; whatever
+    is queued when the writer wakes up is sent in one transfer, and query
+    replies are matched to their futures in order, so set/readback pairs and
+    ramps are pipelined instead of waiting for one round trip per command.
+    """
+
+    def __init__(self, port, channel=1, baudrate=115200, timeout=2.0):
+        self.port = port
+        self.channel = channel
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self._reader = None
+        self._writer = None
+        self._queue = None
+        self._replies = collections.deque()
+        self._sending = []
+        self._tasks = []
+        self._connect_lock = asyncio.Lock()
+
+    @property
+    def is_connected(self):
+        return self._writer is not None
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+            # pyserial-asyncio accepts COM ports, /dev/tty* and pty paths alike
+            import serial_asyncio
+            self._reader, self._writer = await serial_asyncio.open_serial_connection(
+                url=self.port, baudrate=self.baudrate)
+            self._queue = asyncio.Queue()
+            self._tasks = [asyncio.create_task(self._write_loop()),
+                           asyncio.create_task(self._read_loop())]
+            logging.info(f"Connected to power supply on {self.port}")
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        # Fail whatever is still waiting instead of cancelling the callers
+        pending = list(self._replies)
+        self._replies.clear()
+        pending.extend(sent for lines, replies, sent in self._sending)
+        self._sending = []
+        while self._queue is not None and not self._queue.empty():
+            lines, replies, sent = self._queue.get_nowait()
+            pending.extend([*replies, sent])
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError(f"Power supply on {self.port} disconnected"))
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._reader = None
+
+    async def _write_loop(self):
+        while True:
+            batch = [await self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._sending = batch
+            payload = []
+            for lines, replies, sent in batch:
+                payload.extend(lines)
+                self._replies.extend(replies)
+            try:
+                self._writer.write("".join(f"{line}\n" for line in payload).encode())
+                await self._writer.drain()
+            except Exception as e:
+                logging.error(f"Writing to power supply on {self.port} failed: {e}")
+                await self.close()
+                return
+            for lines, replies, sent in batch:
+                if not sent.done():
+                    sent.set_result(None)
+            self._sending = []
+
+    async def _read_loop(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                logging.error(f"Power supply on {self.port} closed the connection")
+                await self.close()
+                return
+            if self._replies:
+                reply = self._replies.popleft()
+                if not reply.done():
+                    reply.set_result(line.decode(errors="replace").strip())
+
+    async def send(self, *lines):
+        """Queue commands; lines ending in '?' return their replies in order.
+
+        Returns once the commands are on the port and every reply arrived.
+        Replies are matched to queries by position, so a command that times
+        out drops the connection: a reply arriving late would otherwise be
+        taken by the next query. The next send reconnects.
+        """
+        await self.connect()
+        loop = asyncio.get_running_loop()
+        replies = [loop.create_future() for line in lines if line.endswith("?")]
+        sent = loop.create_future()
+        self._queue.put_nowait((list(lines), replies, sent))
+        # Long batches get the time the port needs to shift them out on top
+        timeout = self.timeout + self.transfer_time(sum(len(line) + 1 for line in lines))
+        try:
+            results = await asyncio.wait_for(asyncio.gather(sent, *replies), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Power supply on {self.port} did not answer within {timeout:.1f}s, reconnecting")
+            await self.close()
+            raise
+        return results[1:]
+
+    async def write(self, *lines):
+        """Send commands and return the bytes written once they have been
+        handed to the port."""
+        await self.send(*lines)
+        return sum(len(line) + 1 for line in lines)
+
+    def transfer_time(self, size):
+        """Seconds the port needs to shift out size bytes (8N1)."""
+        return size * 10 / self.baudrate
+
+    def select_channel(self):
+        return f"INST OUT{self.channel}"
+
+    async def set_output(self, enabled):
+        await self.send(self.select_channel(), f"OUTP {'ON' if enabled else 'OFF'}")
+
+    async def measure_voltage(self):
+        reply, = await self.send(self.select_channel(), "MEAS:VOLT?")
+        return float(reply)
+
+    async def set_voltage(self, voltage, readback=True):
+        """Set the output voltage; with readback the measured voltage is
+        queried in the same transfer and returned."""
+        lines = [self.select_channel(), f"VOLT {float(voltage):.3f}"]
+        if readback:
+            reply, = await self.send(*lines, "MEAS:VOLT?")
+            return float(reply)
+        await self.send(*lines)
+
+    async def apply_profile(self, voltages):
+        """Send a whole list of set-points as a single transfer."""
+        await self.send(self.select_channel(),
+                        *(f"VOLT {float(voltage):.3f}" for voltage in voltages))
+
+    async def wait_for_voltage(self, voltage, tolerance=VOLTAGE_TOLERANCE, timeout=SETTLE_TIMEOUT):
+        async def settled():
+            try:
+                return abs(await self.measure_voltage() - voltage) <= tolerance
+            except (asyncio.TimeoutError, ConnectionError, ValueError) as e:
+                logging.warning(f"Power supply readback failed: {e}")
+                return False
+        return await wait_until(settled, timeout=timeout, interval=0.02,
+                                description=f"supply readback of {voltage}V") is not False
+
+
+_drivers = {}
+
+
+def get_power_supply():
+    """Shared driver for the supply configured in configs/hardware.json."""
+    settings = load_hardware_config().get("power_supply", {})
+    key = (settings.get("port"), settings.get("channel", 1))
+    if key not in _drivers:
+        _drivers[key] = ToellnerDriver(*key)
+    return _drivers[key]
@@ -0,0 +1,247 @@
+import asyncio
+import contextvars
+import logging
+import os
+import re
+import time
+
+from .HardwareConfig import load_hardware_config
+
+TRACE_DIR = os.path.join("test_results", "ttfis")
+# Bytes per segment file and number of segment files kept on disk
+SEGMENT_SIZE = 64 * 1024 * 1024
+MAX_SEGMENTS = 16
+READ_SIZE = 64 * 1024
+MARKER_PREFIX = "### AutomationGui"
+SEGMENT_PATTERN = re.compile(r"trace_(\d{6})\.log$")
+
+# (case_index, step_index) of the step running in the current context
+current_step = contextvars.ContextVar("current_step", default=None)
+
+
+class TraceCapture:
+    """Streams the TTFis trace port into append-only segment files.
+
+    Offsets are global: a byte keeps its offset for the lifetime of the
+    capture, across segment rotation, so a step can be referenced by the
+    (start, end) range between its markers instead of a copy of the log.
+    Segments older than max_segments are deleted; reading a range that
+    reaches into a deleted segment returns what is still on disk.
+    """
+
+    def __init__(self, port=None, baudrate=115200, directory=TRACE_DIR,
+                 segment_size=SEGMENT_SIZE, max_segments=MAX_SEGMENTS):
+        self.port = port
+        self.baudrate = baudrate
+        self.directory = directory
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+        # [(segment number, global offset of its first byte)]
+        self.segments = []
+        # Rotated segments that could not be removed yet (still mapped on Windows)
+        self._stale_segments = []
+        self.offset = 0
+        self._file = None
+        self._segment_bytes = 0
+        self._line_start = True
+        # Marker lines waiting for the current trace line to end
+        self._pending_markers = []
+        self._reader = None
+        self._writer = None
+        self._task = None
+        self._subscribers = set()
+        # Offsets of the step markers of the current run, keyed by
+        # (case_index, step_index, event)
+        self.run_id = None
+        self.step_offsets = {}
+
+    @property
+    def is_running(self):
+        return self._task is not None and not self._task.done()
+
+    def segment_path(self, number):
+        return os.path.join(self.directory, f"trace_{number:06d}.log")
+
+    def _open_segment(self):
+        if self._file is not None:
+            self._file.close()
+        number = self.segments[-1][0] + 1 if self.segments else 0
+        self.segments.append((number, self.offset))
+        self._file = open(self.segment_path(number), "wb")
+        self._segment_bytes = 0
+        while len(self.segments) > self.max_segments:
+            self._stale_segments.append(self.segments.pop(0)[0])
+        for old_number in list(self._stale_segments):
+            try:
+                os.remove(self.segment_path(old_number))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logging.warning(f"Could not remove trace segment {old_number}: {e}")
+                continue
+            self._stale_segments.remove(old_number)
+
+    def _append(self, data):
+        if self._pending_markers:
+            newline = data.find(b"\n")
+            if newline >= 0:
+                self._write(data[:newline + 1])
+                self._flush_markers()
+                data = data[newline + 1:]
+        if data:
+            self._write(data)
+
+    def _flush_markers(self):
+        markers, self._pending_markers = self._pending_markers, []
+        self._write(b"".join(markers))
+
+    def _write(self, data):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            # Start a new capture; segments of a previous one are stale
+            for name in os.listdir(self.directory):
+                if SEGMENT_PATTERN.match(name):
+                    os.remove(os.path.join(self.directory, name))
+            self._open_segment()
+        elif self._segment_bytes >= self.segment_size and (
+                self._line_start or self._segment_bytes >= 2 * self.segment_size):
+            # Rotate between lines so a segment can be searched on its own
+            self._open_segment()
+        self._file.write(data)
+        self._file.flush()
+        self._segment_bytes += len(data)
+        self.offset += len(data)
+        self._line_start = data.endswith(b"\n")
+        for queue in self._subscribers:
+            queue.put_nowait(data)
+
+    async def start(self):
+        """Connect to the trace port and stream it in the background.
+
+        Without a port, or when the port cannot be opened, only markers are
+        written so step offsets stay valid.
+        """
+        if self.is_running or not self.port:
+            return
+        try:
+            import serial_asyncio
+            self._reader, self._writer = await serial_asyncio.open_serial_connection(
+                url=self.port, baudrate=self.baudrate)
+        except Exception as e:
+            logging.error(f"Could not open TTFis trace port {self.port}: {e}")
+            return
+        self._task = asyncio.create_task(self._read_loop())
+        logging.info(f"Capturing TTFis trace from {self.port} to {self.directory}")
+
+    async def _read_loop(self):
+        while True:
+            data = await self._reader.read(READ_SIZE)
+            if not data:
+                logging.error(f"TTFis trace port {self.port} closed the connection")
+                self._writer = None
+                return
+            self._append(data)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._pending_markers:
+            # The last trace line never ended; keep the markers anyway
+            self._write(b"\n")
+            self._flush_markers()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def mark(self, text):
+        """Write a marker line into the trace and return the global offset
+        where it applies.
+
+        A marker never splits a trace line: while a line is still arriving
+        it is written after that line ends, and the returned offset is the
+        current position in the line.
+        """
+        line = f"{MARKER_PREFIX} {text} {time.time():.6f}\n".encode("utf-8")
+        offset = self.offset
+        if self._line_start and not self._pending_markers:
+            self._write(line)
+        else:
+            self._pending_markers.append(line)
+        return offset
+
+    def mark_step(self, run_id, case_index, step_index, event):
+        if run_id != self.run_id:
+            self.run_id = run_id
+            self.step_offsets = {}
+        offset = self.mark(f"step {run_id} {case_index} {step_index} {event}")
+        self.step_offsets[(case_index, step_index, event)] = offset
+        if event == "start":
+            current_step.set((case_index, step_index))
+        return offset
+
+    def subscribe(self):
+        """Queue receiving every chunk appended from now on; pass it to
+        unsubscribe() when done. Returns (queue, current offset)."""
+        queue = asyncio.Queue()
+        self._subscribers.add(queue)
+        return queue, self.offset
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def read_chunks(self, start, end=None, chunk_size=READ_SIZE):
+        """Yield the bytes of [start, end) from the segment files.
+
+        Safe to call from another thread while the capture keeps appending.
+        """
+        end = self.offset if end is None else min(end, self.offset)
+        for number, first, last in self.segment_ranges():
+            if last <= start or first >= end:
+                continue
+            try:
+                with open(self.segment_path(number), "rb") as f:
+                    f.seek(max(start, first) - first)
+                    remaining = min(end, last) - max(start, first)
+                    while remaining > 0:
+                        data = f.read(min(chunk_size, remaining))
+                        if not data:
+                            break
+                        remaining -= len(data)
+                        yield data
+            except OSError as e:
+                logging.warning(f"Trace segment {number} unavailable: {e}")
+
+    def segment_ranges(self):
+        """[(segment number, first offset, end offset)] of the segments on disk."""
+        segments = list(self.segments)
+        ends = [first for number, first in segments[1:]] + [self.offset]
+        return [(number, first, last) for (number, first), last in zip(segments, ends)]
+
+    def read(self, start, end=None):
+        return b"".join(self.read_chunks(start, end)).decode("utf-8", errors="replace")
+
+
+def trace_port(client):
+    """'GEN3FLEX@COM9' -> 'COM9'; a bare port is returned unchanged."""
+    return client.rpartition("@")[2] if client else None
+
+
+_capture = None
+
+
+def get_trace_capture():
+    """Shared capture for the TTFis client configured in configs/hardware.json."""
+    global _capture
+    if _capture is None:
+        settings = load_hardware_config().get("ttfis_client", {})
+        _capture = TraceCapture(trace_port(settings.get("port")),
+                                settings.get("baudrate", 115200))
+    return _capture
@@ -0,0 +1,277 @@
+import bisect
+import logging
+import mmap
+import os
+import re
+import threading
+
+from .TraceCapture import MARKER_PREFIX
+
+# Bytes between two entries of the sparse index
+INDEX_STRIDE = 256 * 1024
+# Leading "hh:mm:ss.fff" or "[seconds.fraction]" of a trace line
+TIMESTAMP_PATTERN = re.compile(
+    rb"^\s*\[?(?:(\d{1,2}):(\d{2}):(\d{2})(?:[.,](\d{1,6}))?|(\d+\.\d+))")
+MARKER_PATTERN = re.compile(
+    re.escape(MARKER_PREFIX.encode()) + rb" step (\S+) (\d+) (\d+) (start|end)")
+
+
+def parse_timestamp(line):
+    """Seconds of a trace line's leading timestamp, or None."""
+    match = TIMESTAMP_PATTERN.match(line)
+    if not match:
+        return None
+    hours, minutes, seconds, fraction, plain = match.groups()
+    if plain is not None:
+        return float(plain)
+    value = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+    if fraction:
+        value += int(fraction) / 10 ** len(fraction)
+    return value
+
+
+def search_lines(data, pattern, start, end, limit=None):
+    """Lines of data (bytes or mmap) matching pattern in [start, end).
+
+    pattern is a str, bytes or compiled regex. Returns [(offset, line)]
+    with one entry per matching line.
+    """
+    if isinstance(pattern, str):
+        pattern = pattern.encode()
+    if isinstance(pattern, bytes):
+        pattern = re.compile(pattern, re.MULTILINE)
+    results = []
+    position = start
+    while position < end and (limit is None or len(results) < limit):
+        match = pattern.search(data, position, end)
+        if not match:
+            break
+        line_start = data.rfind(b"\n", 0, match.start()) + 1
+        line_end = data.find(b"\n", match.start())
+        line_end = len(data) if line_end < 0 else line_end
+        results.append((line_start, data[line_start:line_end].decode("utf-8", errors="replace")))
+        position = line_end + 1
+    return results
+
+
+class TraceIndex:
+    """Sparse index over a saved trace (.pro or capture segment) file.
+
+    The file is memory-mapped and scanned once: every INDEX_STRIDE bytes the
+    offset, line number and timestamp of the next line start are recorded,
+    together with the position of every AutomationGui step marker. Queries
+    bisect the index and run the regex directly over the mapped range, so
+    only the pages a query touches are read.
+    """
+
+    def __init__(self, path, stride=INDEX_STRIDE):
+        self.path = path
+        self.stride = stride
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self.size = size
+        self.offsets = []
+        self.lines = []
+        self.times = []
+        # [(offset, run_id, case_index, step_index, event)]
+        self.markers = []
+        self._build()
+
+    def _build(self):
+        offset = 0
+        line = 0
+        while offset < self.size:
+            self.offsets.append(offset)
+            self.lines.append(line)
+            self.times.append(parse_timestamp(self.line_at(offset)))
+            next_offset = self.map.find(b"\n", min(offset + self.stride, self.size) - 1)
+            next_offset = self.size if next_offset < 0 else next_offset + 1
+            line += self.map[offset:next_offset].count(b"\n")
+            offset = next_offset
+
+        for match in MARKER_PATTERN.finditer(self.map):
+            run_id, case_index, step_index, event = match.groups()
+            self.markers.append((match.start(), run_id.decode(), int(case_index),
+                                 int(step_index), event.decode()))
+        logging.info(f"Indexed {self.path}: {self.size} bytes, {len(self.offsets)} "
+                     f"index entries, {len(self.markers)} step markers")
+
+    def close(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self._file.close()
+
+    def line_bounds(self, offset):
+        start = self.map.rfind(b"\n", 0, offset) + 1
+        end = self.map.find(b"\n", offset)
+        return start, self.size if end < 0 else end
+
+    def line_at(self, offset):
+        start, end = self.line_bounds(offset)
+        return self.map[start:end]
+
+    def line_number(self, offset):
+        """0-based line number of the line containing offset."""
+        index = bisect.bisect_right(self.offsets, offset) - 1
+        return self.lines[index] + self.map[self.offsets[index]:offset].count(b"\n")
+
+    def search(self, pattern, start=0, end=None, limit=None):
+        """Lines matching pattern (str, bytes or compiled) in [start, end).
+
+        Returns [(offset, line)] with one entry per matching line.
+        """
+        end = self.size if end is None else min(end, self.size)
+        return search_lines(self.map, pattern, start, end, limit)
+
+    def contains(self, pattern, start=0, end=None):
+        return bool(self.search(pattern, start, end, limit=1))
+
+    def describe(self, offset):
+        return f"line {self.line_number(offset) + 1}"
+
+    def time_range(self, start_time=None, end_time=None):
+        """Byte range of the lines stamped between start_time and end_time.
+
+        Timestamps are assumed to increase through the file; index entries
+        without a timestamp are skipped when bisecting.
+        """
+        stamped = [(time, offset) for time, offset in zip(self.times, self.offsets)
+                   if time is not None]
+        times = [time for time, _ in stamped]
+        start = 0
+        if start_time is not None and stamped:
+            index = bisect.bisect_left(times, start_time) - 1
+            start = stamped[index][1] if index >= 0 else 0
+            start = self._seek_time(start, lambda time: time >= start_time)
+        end = self.size
+        if end_time is not None and stamped:
+            index = bisect.bisect_right(times, end_time) - 1
+            begin = stamped[index][1] if index >= 0 else 0
+            end = self._seek_time(max(begin, start), lambda time: time > end_time)
+        return start, end
+
+    def _seek_time(self, offset, reached):
+        """First line start at or after offset whose timestamp satisfies reached."""
+        while offset < self.size:
+            line_start, line_end = self.line_bounds(offset)
+            time = parse_timestamp(self.map[line_start:line_end])
+            if time is not None and reached(time):
+                return line_start
+            offset = line_end + 1
+        return self.size
+
+    def search_time(self, pattern, start_time=None, end_time=None, limit=None):
+        return self.search(pattern, *self.time_range(start_time, end_time), limit=limit)
+
+    def runs(self):
+        return list(dict.fromkeys(marker[1] for marker in self.markers))
+
+    def step_offset(self, step_index, case_index=1, run_id=None, event="start"):
+        """Offset of a step marker; the last run in the file by default."""
+        run_id = run_id or (self.runs() or [None])[-1]
+        for offset, marker_run, marker_case, marker_step, marker_event in self.markers:
+            if (marker_run, marker_case, marker_step, marker_event) == \
+                    (run_id, case_index, step_index, event):
+                return offset
+        return None
+
+    def between_steps(self, step_index, case_index=1, run_id=None):
+        """Byte range from the start of step N to the start of step N+1
+        (or the end of the file when step N+1 never started)."""
+        start = self.step_offset(step_index, case_index, run_id)
+        if start is None:
+            raise LookupError(f"No marker for step {step_index} of test case {case_index} in {self.path}")
+        end = self.step_offset(step_index + 1, case_index, run_id)
+        return start, self.size if end is None else end
+
+
+class CaptureIndex:
+    """Step-range queries over the live TraceCapture, spanning its segments.
+
+    Offsets are the capture's global offsets. Step ranges come from the
+    markers the engine wrote in the current run. Completed segments are
+    searched through their cached TraceIndex; the segment still being
+    written changes on every append, so its range is mapped and searched
+    directly instead of being indexed.
+    """
+
+    def __init__(self, capture):
+        self.capture = capture
+
+    def between_steps(self, step_index, case_index=1, run_id=None):
+        offsets = self.capture.step_offsets
+        if run_id not in (None, self.capture.run_id) or (case_index, step_index, "start") not in offsets:
+            raise LookupError(f"No marker for step {step_index} of test case {case_index} in the trace capture")
+        start = offsets[(case_index, step_index, "start")]
+        return start, offsets.get((case_index, step_index + 1, "start"), self.capture.offset)
+
+    def search(self, pattern, start=0, end=None, limit=None):
+        end = self.capture.offset if end is None else end
+        ranges = self.capture.segment_ranges()
+        # Release the mappings of rotated segments so their files can be removed
+        prune_indexes(self.capture.directory,
+                      [self.capture.segment_path(number) for number, _, _ in ranges[:-1]])
+        results = []
+        for position, (number, first, last) in enumerate(ranges):
+            if last <= start or first >= end:
+                continue
+            if limit is not None and len(results) >= limit:
+                break
+            remaining = None if limit is None else limit - len(results)
+            path = self.capture.segment_path(number)
+            begin, stop = max(start, first) - first, min(end, last) - first
+            try:
+                if position < len(ranges) - 1:
+                    found = open_index(path).search(pattern, begin, stop, remaining)
+                else:
+                    found = search_file(path, last - first, pattern, begin, stop, remaining)
+            except (OSError, ValueError) as e:
+                # ValueError: the segment rotated out and its mapping was closed
+                logging.warning(f"Trace segment {number} unavailable: {e}")
+                continue
+            results += [(first + offset, line) for offset, line in found]
+        return results
+
+    def contains(self, pattern, start=0, end=None):
+        return bool(self.search(pattern, start, end, limit=1))
+
+    def describe(self, offset):
+        return f"trace offset {offset}"
+
+
+def search_file(path, size, pattern, start, end, limit=None):
+    """search_lines over the first size bytes of a file, without indexing it."""
+    if size <= 0:
+        return []
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as data:
+        return search_lines(data, pattern, start, min(end, size), limit)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def open_index(path):
+    """Shared index of a trace file, rebuilt when the file changes."""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    with _indexes_lock:
+        cached = _indexes.get(key)
+        if cached and cached[0] == (stat.st_size, stat.st_mtime_ns):
+            return cached[1]
+        if cached:
+            cached[1].close()
+        index = TraceIndex(path)
+        _indexes[key] = ((stat.st_size, stat.st_mtime_ns), index)
+        return index
+
+
+def prune_indexes(directory, keep):
+    """Close the cached indexes of files in directory that are not in keep."""
+    directory = os.path.abspath(directory)
+    keep = {os.path.abspath(path) for path in keep}
+    with _indexes_lock:
+        for key in [key for key in _indexes
+                    if os.path.dirname(key) == directory and key not in keep]:
+            _indexes.pop(key)[1].close()
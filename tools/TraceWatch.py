@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import re
+
+
+def split_patterns(patterns):
+    """Patterns from a block input: a list, or one string separated by ';'."""
+    if isinstance(patterns, str):
+        patterns = patterns.split(";")
+    return [pattern.strip() for pattern in patterns if pattern and pattern.strip()]
+
+
+def compile_pattern(pattern):
+    try:
+        return re.compile(pattern.encode(), re.MULTILINE)
+    except re.error as e:
+        raise ValueError(f"Invalid trace pattern '{pattern}': {e}") from None
+
+
+def combinable(pattern, regex):
+    """Whether a pattern keeps its meaning inside the combined alternation:
+    no groups of its own, and no global inline flags such as (?i)."""
+    if regex.groups:
+        return False
+    try:
+        re.compile(f"(?:{pattern})".encode())
+    except re.error:
+        return False
+    return True
+
+
+class PatternWatch:
+    """Matches many patterns against a byte stream in one regex pass.
+
+    Required and forbidden patterns are combined into a single alternation
+    of named groups. Patterns with groups of their own or global inline
+    flags are searched on their own instead, since the alternation would
+    renumber their backreferences or reject the flags.
+    When a required pattern matches it is dropped and the alternation
+    recompiled, and the same line is searched again so several patterns on
+    one line all count.
+    """
+
+    def __init__(self, required, forbidden=()):
+        self.required = {f"r{index}": pattern for index, pattern in enumerate(required)}
+        self.forbidden = {f"f{index}": pattern for index, pattern in enumerate(forbidden)}
+        self._separate = {}
+        for name, pattern in {**self.required, **self.forbidden}.items():
+            regex = compile_pattern(pattern)
+            if not combinable(pattern, regex):
+                self._separate[name] = regex
+        self.pending = dict(self.required)
+        self.matches = {}
+        self.violation = None
+        self._buffer = b""
+        self._compile()
+
+    def _compile(self):
+        groups = {name: pattern for name, pattern in {**self.pending, **self.forbidden}.items()
+                  if name not in self._separate}
+        try:
+            self._regex = re.compile("|".join(
+                f"(?P<{name}>{pattern})" for name, pattern in groups.items()).encode(),
+                re.MULTILINE) if groups else None
+        except re.error as e:
+            raise ValueError(f"Invalid trace patterns {list(groups.values())}: {e}") from None
+
+    @property
+    def done(self):
+        return self.violation is not None or not self.pending
+
+    def feed(self, data):
+        """Scan the complete lines of data; returns True once done."""
+        self._buffer += data
+        end = self._buffer.rfind(b"\n") + 1
+        if end:
+            self._scan(self._buffer[:end])
+            self._buffer = self._buffer[end:]
+        return self.done
+
+    def _search(self, text, position):
+        """Earliest (match, name) of the combined and the separate patterns."""
+        found = []
+        if self._regex is not None:
+            match = self._regex.search(text, position)
+            if match:
+                found.append((match, match.lastgroup))
+        for name, regex in self._separate.items():
+            if name in self.pending or name in self.forbidden:
+                match = regex.search(text, position)
+                if match:
+                    found.append((match, name))
+        return min(found, key=lambda item: item[0].start(), default=(None, None))
+
+    def _scan(self, text):
+        position = 0
+        while not self.done:
+            match, name = self._search(text, position)
+            if not match:
+                return
+            line_start = text.rfind(b"\n", 0, match.start()) + 1
+            line_end = text.find(b"\n", match.start())
+            line = text[line_start:line_end].decode("utf-8", errors="replace")
+            if name in self.forbidden:
+                self.violation = (self.forbidden[name], line)
+                return
+            self.matches[self.pending.pop(name)] = line
+            self._compile()
+            position = line_start
+
+
+async def watch_trace(capture, required, forbidden=(), timeout=30, since=None):
+    """Wait until every required pattern appeared in the trace, or any
+    forbidden one did. Data from offset `since` on is scanned first.
+
+    Returns the finished PatternWatch; check .pending and .violation.
+    """
+    watch = PatternWatch(required, forbidden)
+    queue, offset = capture.subscribe()
+    try:
+        if since is not None:
+            for data in capture.read_chunks(since, offset):
+                if watch.feed(data):
+                    return watch
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while not watch.done:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                data = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            watch.feed(data)
+    finally:
+        capture.unsubscribe(queue)
+    if not watch.done:
+        logging.debug(f"Trace watch timed out with {len(watch.pending)} pattern(s) pending")
+    return watch
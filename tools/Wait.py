@@ -0,0 +1,28 @@
+import asyncio
+import inspect
+import logging
+import time
+
+
+async def wait_until(condition, timeout=30.0, interval=0.1, backoff=1.5,
+                     max_interval=2.0, description=None):
+    """Poll condition (sync or async callable) until it returns a truthy value.
+
+    The poll interval starts at `interval` and grows by `backoff` up to
+    `max_interval`. Returns the truthy value, or False once `timeout` seconds
+    have passed.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        result = condition()
+        if inspect.isawaitable(result):
+            result = await result
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            if description:
+                logging.warning(f"Timed out after {timeout}s waiting for {description}")
+            return False
+        await asyncio.sleep(min(interval, remaining))
+        interval = min(interval * backoff, max_interval)
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+
+import numpy as np
+
+# Default spacing between two set-points in seconds
+DEFAULT_STEP = 0.001
+
+
+def ramp(start=12.0, end=6.0, duration=1.0, step=DEFAULT_STEP):
+    times = np.arange(0.0, duration + step / 2, step)
+    return times, np.linspace(start, end, len(times))
+
+
+def sine(offset=12.0, amplitude=1.0, frequency=1.0, duration=1.0, step=DEFAULT_STEP):
+    times = np.arange(0.0, duration + step / 2, step)
+    return times, offset + amplitude * np.sin(2 * np.pi * frequency * times)
+
+
+def crank(nominal=12.0, low=6.0, recover=8.0, fall=0.005, hold=0.015,
+          rise=0.05, plateau=1.0, settle=0.1, step=DEFAULT_STEP):
+    """Starting profile: fast drop to `low`, short hold, rise to the `recover`
+    plateau while the engine cranks, then back to `nominal`."""
+    corners_t = np.cumsum([0.0, fall, hold, rise, plateau, settle])
+    corners_v = np.array([nominal, low, low, recover, recover, nominal])
+    times = np.arange(0.0, corners_t[-1] + step / 2, step)
+    return times, np.interp(times, corners_t, corners_v)
+
+
+def load_csv(file_path):
+    """Two columns: time in seconds and voltage; a header line is allowed."""
+    data = np.genfromtxt(file_path, delimiter=",", names=None, comments="#")
+    data = data[~np.isnan(data).any(axis=1)]
+    return data[:, 0] - data[0, 0], data[:, 1]
+
+
+PROFILES = {"ramp": ramp, "sine": sine, "crank": crank}
+
+
+def parse_profile(spec):
+    """Build (times, voltages) from a CSV path or a 'name:key=value,...'
+    description such as 'ramp:start=12,end=6,duration=0.5'."""
+    spec = spec.strip()
+    name, _, arguments = spec.partition(":")
+    if name.lower() not in PROFILES:
+        return load_csv(spec)
+    kwargs = {}
+    for argument in filter(None, arguments.split(",")):
+        key, _, value = argument.partition("=")
+        kwargs[key.strip()] = float(value)
+    return PROFILES[name.lower()](**kwargs)
+
+
+async def stream_profile(supply, times, voltages):
+    """Send each set-point so it leaves the serial line at its scheduled time.
+
+    The channel is selected once. Set-points that are due are written as one
+    batch and awaited until drained. A point counts as sent when the line
+    has shifted it out, modelled from the batch size and the baud rate, so
+    points queued behind a busy line show up as lateness. Deadlines are
+    computed from the start of the profile, so sleep overshoot does not
+    accumulate. Returns once the last point is on the line, with the timing
+    error statistics in seconds.
+    """
+    loop = asyncio.get_running_loop()
+    commands = [f"VOLT {float(voltage):.3f}" for voltage in voltages]
+    sizes = np.array([len(command) + 1 for command in commands])
+    if len(times) > 1 and supply.transfer_time(sizes.sum()) > times[-1]:
+        logging.warning(
+            f"Waveform needs {supply.transfer_time(sizes.sum()):.3f}s of serial time "
+            f"for a {times[-1]:.3f}s profile; set-points will fall behind")
+
+    await supply.write(supply.select_channel())
+    lateness = np.empty(len(times))
+    start = loop.time()
+    line_free = start
+    index = 0
+    while index < len(times):
+        delay = start + times[index] - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        now = loop.time()
+        due = max(int(np.searchsorted(times, now - start, side="right")), index + 1)
+        await supply.write(*commands[index:due])
+        # The batch starts shifting out once the line is free
+        begin = max(now, line_free)
+        finished = begin + supply.transfer_time(np.cumsum(sizes[index:due]))
+        lateness[index:due] = finished - (start + times[index:due])
+        line_free = finished[-1]
+        index = due
+    # Return only once the tail of the profile has reached the supply
+    if line_free > loop.time():
+        await asyncio.sleep(line_free - loop.time())
+
+    jitter = np.abs(lateness)
+    stats = {
+        "points": len(times),
+        "requested_duration": float(times[-1]) if len(times) else 0.0,
+        "achieved_duration": line_free - start,
+        "mean_jitter": float(jitter.mean()) if len(times) else 0.0,
+        "p95_jitter": float(np.percentile(jitter, 95)) if len(times) else 0.0,
+        "max_jitter": float(jitter.max()) if len(times) else 0.0,
+    }
+    logging.info(
+        f"Waveform: {stats['points']} points, requested {stats['requested_duration']:.3f}s, "
+        f"achieved {stats['achieved_duration']:.3f}s, jitter mean {stats['mean_jitter'] * 1000:.2f}ms "
+        f"p95 {stats['p95_jitter'] * 1000:.2f}ms max {stats['max_jitter'] * 1000:.2f}ms")
+    return stats